@@ -17,11 +17,29 @@ EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2")
 EMBEDDING_DIMENSION = 768
 LLM_MODEL = os.getenv("LLM_MODEL", "gemini-flash-latest")  # Validated model name
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "8"))  # seconds before falling back to Ollama
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "60"))  # seconds to connect / wait for the next chunk
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # how long Ollama keeps the model loaded between requests
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "1.5"))  # seconds before chat also asks Ollama
+FORCE_CPU = os.getenv("CITADEL_FORCE_CPU", "false").lower() == "true"  # keep local models off the GPU
+OCR_MAX_IMAGE_SIDE = 1600  # scans are downsampled to this long edge before OCR
+# EasyOCR worker processes on CPU (each loads its own reader); 0 keeps OCR in-process
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))
+# int8 dynamic quantization of the embedding models when running on CPU
+QUANTIZE_EMBEDDINGS = os.getenv("QUANTIZE_EMBEDDINGS", "false").lower() == "true"
+# int8 ONNX export used by the document classifier when present (setup/export_onnx_encoder.py)
+CLASSIFIER_ONNX_DIR = os.getenv("CLASSIFIER_ONNX_DIR", "models/classifier-int8")
+# Serve the shared EMBEDDING_MODEL from that export on CPU (onnxruntime int8 instead of torch)
+ONNX_EMBEDDINGS = os.getenv("ONNX_EMBEDDINGS", "false").lower() == "true"
 
 # Confidence Thresholds (from gemini.md)
 CONFIDENCE_THRESHOLD_LOW = 0.60  # Mandatory human review
 CONFIDENCE_THRESHOLD_HIGH = 0.80  # Auto-accept (except enforcement)
 
+# Audit Sampling: fraction of decisions not needing review that are stored in full
+# (the rest only bump ai_decision_counters); 1.0 stores everything
+AUDIT_SAMPLE_RATE = float(os.getenv("AUDIT_SAMPLE_RATE", "1.0"))
+
 # Rate Limits
 RATE_LIMIT_CITIZEN = 60  # requests per minute
 RATE_LIMIT_ANONYMOUS = 10  # requests per hour
@@ -30,6 +48,10 @@ CHAT_SESSION_MAX_MESSAGES = 50
 # Service Timeouts
 SERVICE_TIMEOUT_SECONDS = 30
 
+# Redis (Optional): state shared by all workers (news analysis jobs, dashboard counters).
+# Unset keeps that state per process, which is only correct with a single worker.
+REDIS_URL = os.getenv("REDIS_URL", "")
+
 # MCP Configuration
 MCP_ENABLED = os.getenv("MCP_ENABLED", "true").lower() == "true"
 MCP_BASE_URL = os.getenv("MCP_BASE_URL", "http://localhost:8001")
@@ -38,3 +60,19 @@ MCP_BASE_URL = os.getenv("MCP_BASE_URL", "http://localhost:8001")
 ENABLE_PII_DETECTION = True
 ENABLE_ACTIVE_LEARNING = True
 REQUIRE_HITL_FOR_ENFORCEMENT = True
+ENABLE_CLASSIFIER_CACHE = os.getenv("ENABLE_CLASSIFIER_CACHE", "true").lower() == "true"
+
+# Cache Sizes
+CLASSIFIER_CACHE_SIZE = 2048
+DETECTOR_CACHE_SIZE = 2048  # per-sensor IsolationForest models kept in memory
+NEWS_CACHE_SIZE = 2048  # analyzed articles kept per process
+NEWS_CACHE_TTL_SECONDS = 3600
+NEWS_MAX_PAGE_BYTES = 2_000_000  # article downloads are cut off past this size
+SEMANTIC_CACHE_SIZE = 1024  # chatbot answers remembered per process
+SEMANTIC_CACHE_THRESHOLD = 0.97  # cosine similarity for two questions to share an answer
+SEMANTIC_CACHE_TTL_SECONDS = 600
+QUERY_EMBEDDING_CACHE_SIZE = 1024  # normalized search/chat queries with their embeddings
+
+# Query Embedding Micro-batching: concurrent single-query encodes share one encode() call
+EMBED_BATCH_MAX = 32
+EMBED_BATCH_WAIT_SECONDS = 0.005  # extra time to collect a batch once the first query arrives
@@ -12,6 +12,12 @@ from contextlib import asynccontextmanager
 from routers import documents, chat, tickets, admin, resumes, expenses, anomaly, news
 from routers import dashboard, support_tickets, traffic_violations
 from middleware.access_control import AccessControl
+from services.write_queue import get_write_queue
+from services.stats_counters import seed_gauges
+from services.context_engine import get_context_engine
+from services.audit_service import flush_decision_counters
+from services.ocr_pool import shutdown_ocr_pool
+from services.news_analyzer import close_http_session
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -22,9 +28,17 @@ async def lifespan(app: FastAPI):
     print("Context Engine: Ready")
     print("MCP Connection: Ready")
     print("Supabase Connection: Ready")
+    get_write_queue().start()
+    print("Write Queue: Running")
+    await seed_gauges()
     yield
     # Shutdown
     print("CITADEL Backend Shutting Down...")
+    await get_context_engine().flush_pending()
+    await flush_decision_counters()
+    await get_write_queue().stop()
+    shutdown_ocr_pool()
+    await close_http_session()
 
 app = FastAPI(
     title="C.I.T.A.D.E.L. API",
@@ -33,6 +47,21 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Single app-wide handler for unexpected errors (routers don't wrap their bodies).
+# Registered before CORSMiddleware so it runs inside it and the 500 still gets CORS headers;
+# an @app.exception_handler(Exception) would sit outside CORS in ServerErrorMiddleware.
+@app.middleware("http")
+async def handle_unexpected_error(request: Request, call_next):
+    """Convert any unhandled exception into a JSON 500 response"""
+    try:
+        return await call_next(request)
+    except Exception as exc:
+        print(f"Unhandled error on {request.method} {request.url.path}: {exc}")
+        return JSONResponse(
+            status_code=500,
+            content={"detail": str(exc)}
+        )
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
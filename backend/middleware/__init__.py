@@ -1,9 +1,10 @@
 # Middleware package
-from .access_control import UserRole, AccessControl, verify_role, enforce_role_based_access
+from .access_control import UserRole, AccessControl, verify_role, require_gov_or_admin, enforce_role_based_access
 
 __all__ = [
     'UserRole',
     'AccessControl', 
     'verify_role',
+    'require_gov_or_admin',
     'enforce_role_based_access'
 ]
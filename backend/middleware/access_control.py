@@ -4,7 +4,7 @@ Enforces portal-specific access to API endpoints.
 """
 
 from enum import Enum
-from fastapi import Header, HTTPException, Request
+from fastapi import Depends, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 from typing import Optional
 
@@ -77,6 +77,16 @@ async def verify_role(
         raise HTTPException(status_code=403, detail="Invalid user role")
 
 
+GOVERNMENT_ROLES = frozenset({UserRole.GOVERNMENT_OFFICIAL.value, UserRole.ADMIN.value})
+
+
+async def require_gov_or_admin(auth: dict = Depends(verify_role)):
+    """Dependency that only admits government officials and admins"""
+    if auth['role'] not in GOVERNMENT_ROLES:
+        raise HTTPException(status_code=403, detail="Government officials only")
+    return auth
+
+
 async def enforce_role_based_access(request: Request, call_next):
     """
     Middleware to intercept all requests and verify role-based permissions.
@@ -2,7 +2,7 @@
 Admin Router - Administrative API endpoints
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from uuid import UUID
 
@@ -13,8 +13,13 @@ from services.audit_service import (
 
 router = APIRouter()
 
+# Mock user ID for demo
+_DEMO_USER_ID = UUID("00000000-0000-0000-0000-000000000001")
+
 
 class HumanOverride(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     decision: str  # 'approved', 'rejected', 'modified'
     notes: Optional[str] = None
     corrected_output: Optional[dict] = None
@@ -40,15 +45,11 @@ async def get_lineage(decision_id: UUID):
 @router.post("/override/{decision_id}")
 async def human_override(decision_id: UUID, override: HumanOverride):
     """Record a human override of an AI decision"""
-    try:
-        reviewer_id = UUID("00000000-0000-0000-0000-000000000001")
-        await record_human_override(
-            decision_id=decision_id,
-            reviewer_id=reviewer_id,
-            decision=override.decision,
-            notes=override.notes,
-            corrected_output=override.corrected_output
-        )
-        return {"success": True, "message": "Override recorded"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    await record_human_override(
+        decision_id=decision_id,
+        reviewer_id=_DEMO_USER_ID,
+        decision=override.decision,
+        notes=override.notes,
+        corrected_output=override.corrected_output
+    )
+    return {"success": True, "message": "Override recorded"}
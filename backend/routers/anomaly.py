@@ -1,12 +1,12 @@
 """
 Anomaly Router - Sensor Anomaly Detection API endpoints
 """
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict
+from fastapi import APIRouter
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, Dict, List
 
 from services.anomaly_service import (
-    ingest_sensor_reading, correlate_sensors,
+    ingest_sensor_reading, ingest_sensor_readings, correlate_sensors,
     get_sensor_baseline, list_recent_anomalies,
     get_detector
 )
@@ -16,25 +16,37 @@ router = APIRouter()
 
 
 class SensorReading(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     sensor_id: str
     sensor_type: str
     value: float
     location: Optional[Dict] = None
 
 
+class SensorReadingBatch(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
+    readings: List[SensorReading]
+
+
 @router.post("/reading")
 async def add_sensor_reading(reading: SensorReading):
     """Ingest sensor reading and detect anomalies"""
-    try:
-        result = await ingest_sensor_reading(
-            sensor_id=reading.sensor_id,
-            sensor_type=reading.sensor_type,
-            value=reading.value,
-            location=reading.location
-        )
-        return {"success": True, "reading": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await ingest_sensor_reading(
+        sensor_id=reading.sensor_id,
+        sensor_type=reading.sensor_type,
+        value=reading.value,
+        location=reading.location
+    )
+    return {"success": True, "reading": result}
+
+
+@router.post("/readings")
+async def add_sensor_readings(batch: SensorReadingBatch):
+    """Ingest a batch of sensor readings (thresholds checked in one vectorized pass)"""
+    results = await ingest_sensor_readings([r.model_dump() for r in batch.readings])
+    return {"success": True, "count": len(results), "readings": results}
 
 
 @router.get("/correlate/{zone_id}")
@@ -78,7 +90,7 @@ async def train_models(dataset: str = "uci"):
         detector = get_detector("air_quality_sensor_1")
         if values:
             detector.train(values)
-            detector.history = values[-200:] # Keep recent history
+            detector.load_history(values) # Keep recent history
             count = len(values)
         
     elif dataset == "nab":
@@ -88,7 +100,7 @@ async def train_models(dataset: str = "uci"):
             values = [d['value'] for d in data]
             detector = get_detector(sensor_id)
             detector.train(values)
-            detector.history = values[-200:]
+            detector.load_history(values)
             count = len(values)
             
     return {"message": f"Trained models on {count} data points from {dataset}"}
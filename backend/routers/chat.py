@@ -1,19 +1,25 @@
 """
 Chat Router - RAG Chatbot API endpoints
 """
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from uuid import UUID
 
 from services.rag_service import (
     create_chat_session, chat, get_chat_history
 )
+from services.stats_counters import get_stats_counters
 
 router = APIRouter()
 
+# Mock user ID for demo
+_DEMO_USER_ID = UUID("00000000-0000-0000-0000-000000000001")
+
 
 class ChatMessage(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     message: str
     session_id: Optional[str] = None
 
@@ -21,32 +27,26 @@ class ChatMessage(BaseModel):
 @router.post("/")
 async def send_message(msg: ChatMessage):
     """Send message and get AI response with citations"""
-    try:
-        # Mock user ID for demo
-        user_id = UUID("00000000-0000-0000-0000-000000000001")
-        
-        # Create session if not provided
-        if msg.session_id:
-            session_id = UUID(msg.session_id)
-        else:
-            session_id = await create_chat_session(user_id, "rag")
-        
-        result = await chat(
-            session_id=session_id,
-            user_id=user_id,
-            message=msg.message,
-            session_type="rag"
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Create session if not provided
+    if msg.session_id:
+        session_id = UUID(msg.session_id)
+    else:
+        session_id = await create_chat_session(_DEMO_USER_ID, "rag")
+    
+    result = await chat(
+        session_id=session_id,
+        user_id=_DEMO_USER_ID,
+        message=msg.message,
+        session_type="rag"
+    )
+    get_stats_counters().increment('citizen', 'queries_this_month')
+    return result
 
 
 @router.post("/session")
 async def create_session(session_type: str = "rag"):
     """Create a new chat session"""
-    user_id = UUID("00000000-0000-0000-0000-000000000001")
-    session_id = await create_chat_session(user_id, session_type)
+    session_id = await create_chat_session(_DEMO_USER_ID, session_type)
     return {"session_id": str(session_id)}
 
 
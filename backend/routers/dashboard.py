@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, Request
 from typing import Dict, List, Any
 
 from middleware.access_control import verify_role
+from services.stats_counters import get_stats_counters
 
 router = APIRouter()
 
@@ -18,10 +19,8 @@ async def get_dashboard_data(
 ) -> Dict[str, Any]:
     """Return role-appropriate dashboard data"""
     
-    if auth['role'] == 'government_official':
-        return _get_government_dashboard_static(auth['user_id'])
-    else:
-        return _get_citizen_dashboard_static(auth['user_id'])
+    builder = _DASHBOARD_BUILDERS.get(auth['role'], _get_citizen_dashboard_static)
+    return builder(auth['user_id'])
 
 
 def _get_government_dashboard_static(user_id: str) -> Dict[str, Any]:
@@ -113,23 +112,17 @@ def _get_citizen_dashboard_static(user_id: str) -> Dict[str, Any]:
     }
 
 
+# Role -> dashboard builder; any other role gets the citizen view
+_DASHBOARD_BUILDERS = {
+    'government_official': _get_government_dashboard_static,
+    'citizen': _get_citizen_dashboard_static,
+}
+
+
 @router.get("/stats")
 async def get_dashboard_stats(auth: dict = Depends(verify_role)) -> Dict[str, Any]:
     """Get aggregated statistics for dashboard"""
     
-    # In production, query database for real stats
-    if auth['role'] == 'government_official':
-        return {
-            'documents_processed_today': 24,
-            'violations_detected_today': 8,
-            'active_alerts': 3,
-            'pending_reviews': 12,
-            'candidates_in_pipeline': 45
-        }
-    else:
-        return {
-            'queries_this_month': 15,
-            'open_tickets': 2,
-            'resolved_tickets': 5,
-            'news_checks': 8
-        }
+    # One snapshot read of the live counters instead of per-field queries
+    role = 'government_official' if auth['role'] == 'government_official' else 'citizen'
+    return get_stats_counters().snapshot(role)
@@ -8,9 +8,13 @@ from uuid import UUID
 from services.document_intel import (
     upload_document, get_document, search_documents
 )
+from services.stats_counters import get_stats_counters
 
 router = APIRouter()
 
+# Mock user ID for demo
+_DEMO_USER_ID = UUID("00000000-0000-0000-0000-000000000001")
+
 
 @router.post("/upload")
 async def upload_doc(
@@ -19,21 +23,17 @@ async def upload_doc(
     source_tier: str = "demo"
 ):
     """Upload and process a document"""
-    try:
-        content = await file.read()
-        # Mock user ID for demo
-        uploader_id = UUID("00000000-0000-0000-0000-000000000001")
-        
-        result = await upload_document(
-            file_content=content,
-            filename=file.filename,
-            doc_type=doc_type,
-            source_tier=source_tier,
-            uploader_id=uploader_id
-        )
-        return {"success": True, "document": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    content = await file.read()
+    
+    result = await upload_document(
+        file_content=content,
+        filename=file.filename,
+        doc_type=doc_type,
+        source_tier=source_tier,
+        uploader_id=_DEMO_USER_ID
+    )
+    get_stats_counters().increment('government_official', 'documents_processed_today')
+    return {"success": True, "document": result}
 
 
 @router.get("/{document_id}")
@@ -2,12 +2,12 @@
 Expenses Router - Expense Categorization API endpoints
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import date
 
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import date
 
@@ -22,17 +22,16 @@ router = APIRouter()
 @router.post("/upload")
 async def upload_receipt(file: UploadFile = File(...)):
     """Upload and process a receipt image"""
-    try:
-        content = await file.read()
-        result = await process_receipt(content)
-        if "error" in result: # Handle error from service
-             raise HTTPException(status_code=400, detail=result["error"])
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    content = await file.read()
+    result = await process_receipt(content)
+    if "error" in result: # Handle error from service
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
 
 
 class ExpenseCreate(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     department: str
     amount: float
     description: str
@@ -41,15 +40,12 @@ class ExpenseCreate(BaseModel):
 @router.post("/")
 async def add_expense(expense: ExpenseCreate):
     """Add and categorize an expense"""
-    try:
-        result = await ingest_expense(
-            department=expense.department,
-            amount=expense.amount,
-            description=expense.description
-        )
-        return {"success": True, "expense": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await ingest_expense(
+        department=expense.department,
+        amount=expense.amount,
+        description=expense.description
+    )
+    return {"success": True, "expense": result}
 
 
 @router.get("/summary/{department}")
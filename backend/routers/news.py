@@ -1,13 +1,22 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel, HttpUrl
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from pydantic import BaseModel, ConfigDict, HttpUrl
 from services.news_analyzer import analyze_news_url
+from services.stats_counters import get_stats_counters
+from services.job_store import JobStore
 from typing import Dict, List, Optional
 from datetime import datetime
 from uuid import uuid4
+import asyncio
 
 router = APIRouter(tags=["News Authenticity"])
 
+# Background analysis jobs, shared by all workers: job_id -> {status, result, error}
+NEWS_JOB_TTL_SECONDS = 3600
+_news_jobs = JobStore("news_job", NEWS_JOB_TTL_SECONDS)
+
 class NewsRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     url: HttpUrl
 
 class NewsResponse(BaseModel):
@@ -22,23 +31,54 @@ class NewsResponse(BaseModel):
     trust_signals: List[str]
     analyzed_at: str
 
-@router.post("/analyze", response_model=NewsResponse)
-async def analyze_article(request: NewsRequest):
-    """
-    Analyze a news article for authenticity.
-    """
+class NewsJobStatus(BaseModel):
+    job_id: str
+    status: str  # 'pending', 'completed', 'failed'
+    result: Optional[NewsResponse] = None
+    error: Optional[str] = None
+
+
+async def _run_analysis(job_id: str, url: str) -> None:
+    """Run the analysis outside the request and record the outcome for polling"""
+    job = {'status': 'pending', 'result': None, 'error': None}
     try:
-        # call the service
-        result = await analyze_news_url(str(request.url))
-        return result
+        job['result'] = await analyze_news_url(url)
+        job['status'] = 'completed'
+        get_stats_counters().increment('citizen', 'news_checks')
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        job['error'] = str(e)
+        job['status'] = 'failed'
+    
+    await asyncio.to_thread(_news_jobs.put, job_id, job)
+
+
+@router.post("/analyze", status_code=202)
+async def analyze_article(request: NewsRequest, background_tasks: BackgroundTasks):
+    """
+    Queue a news article for authenticity analysis.
+    Returns {job_id, status}; poll /status/{job_id} for the result.
+    """
+    job_id = str(uuid4())
+    await asyncio.to_thread(_news_jobs.put, job_id, {'status': 'pending', 'result': None, 'error': None})
+    background_tasks.add_task(_run_analysis, job_id, str(request.url))
+    
+    return {"job_id": job_id, "status": "pending"}
 
 @router.get("/status")
 async def get_status():
     return {"status": "News Analyzer Online", "version": "1.0.0"}
 
 
+@router.get("/status/{job_id}", response_model=NewsJobStatus)
+async def get_analysis_status(job_id: str):
+    """Get the status (and result, once complete) of a queued analysis"""
+    job = await asyncio.to_thread(_news_jobs.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    
+    return {'job_id': job_id, 'status': job['status'], 'result': job['result'], 'error': job['error']}
+
+
 @router.get("/")
 async def get_fake_news_overview(
     limit: int = 10
@@ -1,19 +1,22 @@
 """
 Resumes Router - Resume Screening API endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from pydantic import BaseModel
+from fastapi import APIRouter, UploadFile, File, Form
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from uuid import UUID
 
 from services.resume_service import (
     parse_resume, create_job, match_resume_to_job, get_top_candidates, screen_resumes_batch
 )
+from services.stats_counters import get_stats_counters
 
 router = APIRouter()
 
 
 class JobCreate(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     title: str
     department: str
     description: str
@@ -28,18 +31,14 @@ async def screen_resumes(
     files: List[UploadFile] = File(...)
 ):
     """Screen multiple resumes against a job description"""
-    try:
-        file_data = []
-        for file in files:
-            content = await file.read()
-            file_data.append((file.filename, content))
-        
-        # Process in batch
-        results = await screen_resumes_batch(file_data, job_description)
-        return {"success": True, "candidates": results}
-    except Exception as e:
-        print(f"Screening error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    file_data = []
+    for file in files:
+        content = await file.read()
+        file_data.append((file.filename, content))
+    
+    # Process in batch
+    results = await screen_resumes_batch(file_data, job_description)
+    return {"success": True, "candidates": results}
 
 
 @router.post("/upload")
@@ -48,39 +47,31 @@ async def upload_resume(
     candidate_name: Optional[str] = None
 ):
     """Upload and parse a resume"""
-    try:
-        content = await file.read()
-        result = await parse_resume(content, file.filename, candidate_name)
-        return {"success": True, "resume": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    content = await file.read()
+    result = await parse_resume(content, file.filename, candidate_name)
+    get_stats_counters().increment('government_official', 'candidates_in_pipeline')
+    return {"success": True, "resume": result}
 
 
 @router.post("/jobs")
 async def create_new_job(job: JobCreate):
     """Create a job posting"""
-    try:
-        result = await create_job(
-            title=job.title,
-            department=job.department,
-            description=job.description,
-            required_skills=job.required_skills,
-            preferred_skills=job.preferred_skills,
-            experience_min=job.experience_min
-        )
-        return {"success": True, "job": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await create_job(
+        title=job.title,
+        department=job.department,
+        description=job.description,
+        required_skills=job.required_skills,
+        preferred_skills=job.preferred_skills,
+        experience_min=job.experience_min
+    )
+    return {"success": True, "job": result}
 
 
 @router.post("/match/{resume_id}/{job_id}")
 async def match_to_job(resume_id: UUID, job_id: UUID):
     """Match a resume to a job"""
-    try:
-        result = await match_resume_to_job(resume_id, job_id)
-        return {"success": True, "match": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await match_resume_to_job(resume_id, job_id)
+    return {"success": True, "match": result}
 
 
 @router.get("/candidates/{job_id}")
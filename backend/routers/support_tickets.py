@@ -4,17 +4,20 @@ Citizen-facing ticket submission and tracking.
 """
 
 from fastapi import APIRouter, Depends, Request, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 
 from services.support_ticket_analyzer import get_ticket_analyzer
 from services.context_engine import get_context_engine, CitizenContext
 from middleware.access_control import verify_role
+from services.stats_counters import get_stats_counters
 
 router = APIRouter()
 
 
 class TicketSubmission(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     title: str
     description: str
     contact_email: Optional[str] = None
@@ -50,6 +53,7 @@ async def submit_ticket(
         user_id=auth['user_id'],
         contact_email=ticket.contact_email
     )
+    get_stats_counters().increment('citizen', 'open_tickets')
     
     # Update citizen context
     try:
@@ -60,7 +64,8 @@ async def submit_ticket(
     except Exception:
         pass  # Context update is non-critical
     
-    return TicketResponse(**analysis)
+    # Analyzer output is trusted; skip re-validating it field by field
+    return TicketResponse.model_construct(**analysis)
 
 
 @router.get("/my-tickets")
@@ -2,7 +2,7 @@
 Tickets Router - Ticket Analyzer API endpoints
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from uuid import UUID
 
@@ -13,34 +13,39 @@ from services.ticket_service import (
 
 router = APIRouter()
 
+# Mock user ID for demo
+_DEMO_USER_ID = UUID("00000000-0000-0000-0000-000000000001")
+
 
 class TicketCreate(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     title: str
     description: str
 
 
 class TicketUpdate(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     status: str
     notes: Optional[str] = None
 
 
 class TicketAssign(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, validate_assignment=False)
+
     assignee_id: str
 
 
 @router.post("/")
 async def create_new_ticket(ticket: TicketCreate):
     """Create a new ticket with AI classification"""
-    try:
-        submitter_id = UUID("00000000-0000-0000-0000-000000000001")
-        result = await create_ticket(
-            title=ticket.title,
-            description=ticket.description,
-            submitter_id=submitter_id
-        )
-        return {"success": True, "ticket": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await create_ticket(
+        title=ticket.title,
+        description=ticket.description,
+        submitter_id=_DEMO_USER_ID
+    )
+    return {"success": True, "ticket": result}
 
 
 @router.get("/queue")
@@ -66,29 +71,21 @@ async def get_single_ticket(ticket_id: UUID):
 @router.patch("/{ticket_id}/status")
 async def update_status(ticket_id: UUID, update: TicketUpdate):
     """Update ticket status"""
-    try:
-        user_id = UUID("00000000-0000-0000-0000-000000000001")
-        result = await update_ticket_status(
-            ticket_id=ticket_id,
-            new_status=update.status,
-            updated_by=user_id,
-            notes=update.notes
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await update_ticket_status(
+        ticket_id=ticket_id,
+        new_status=update.status,
+        updated_by=_DEMO_USER_ID,
+        notes=update.notes
+    )
+    return result
 
 
 @router.patch("/{ticket_id}/assign")
 async def assign_to_operator(ticket_id: UUID, assign: TicketAssign):
     """Assign ticket to operator"""
-    try:
-        user_id = UUID("00000000-0000-0000-0000-000000000001")
-        result = await assign_ticket(
-            ticket_id=ticket_id,
-            assignee_id=UUID(assign.assignee_id),
-            assigned_by=user_id
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await assign_ticket(
+        ticket_id=ticket_id,
+        assignee_id=UUID(assign.assignee_id),
+        assigned_by=_DEMO_USER_ID
+    )
+    return result
@@ -4,38 +4,50 @@ Government-facing traffic violation detection and management.
 """
 
 from fastapi import APIRouter, UploadFile, File, Depends, Request, HTTPException
-from typing import List, Optional
+from fastapi.responses import FileResponse
+from typing import BinaryIO, List, Optional
 from pathlib import Path
+import asyncio
+import os
+import shutil
+import tempfile
 
 from services.traffic_violations import get_traffic_detector
 from services.context_engine import get_context_engine, GovernmentContext
-from middleware.access_control import verify_role
+from middleware.access_control import require_gov_or_admin
+from services.stats_counters import get_stats_counters
 
-from services.rag_service import supabase # Use the existing supabase client
+from services.supabase_client import get_async_supabase
 
 router = APIRouter()
 
 @router.get("/fines")
 async def get_fines():
     """Get all fine amounts from the government database"""
-    try:
-        response = supabase.table("govt_fines_penalties").select("*").execute()
-        return response.data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    supabase = await get_async_supabase()
+    response = await supabase.table("govt_fines_penalties").select("*").execute()
+    return response.data
 
 
 # Ensure temp directory exists
 Path(".tmp").mkdir(exist_ok=True)
 
 
+def _save_upload(src: BinaryIO, suffix: str) -> str:
+    """Copy an upload's spooled file to a unique temp file in fixed-size chunks"""
+    src.seek(0)
+    with tempfile.NamedTemporaryFile(dir=".tmp", suffix=suffix, delete=False) as tmp:
+        shutil.copyfileobj(src, tmp, length=1024 * 1024)
+    return tmp.name
+
+
 @router.post("/analyze")
 async def analyze_traffic_footage(
     request: Request,
     video: UploadFile = File(...),
     violation_types: str = "helmetless,red_light",
     location: Optional[str] = None,
-    auth: dict = Depends(verify_role)
+    auth: dict = Depends(require_gov_or_admin)
 ):
     """
     Analyze traffic footage for violations (government officials only).
@@ -49,22 +61,23 @@ async def analyze_traffic_footage(
         Analysis results with detected violations and evidence
     """
     
-    # Check role
-    if auth['role'] not in ['government_official', 'admin']:
-        raise HTTPException(status_code=403, detail="Government officials only")
-    
-    # Save uploaded file
-    video_path = f".tmp/{video.filename}"
-    with open(video_path, "wb") as f:
-        content = await video.read()
-        f.write(content)
+    # Save uploaded file off the event loop, without buffering it all in memory.
+    # A unique temp name keeps concurrent uploads of the same filename apart.
+    suffix = Path(video.filename or "").suffix
+    video_path = await asyncio.to_thread(_save_upload, video.file, suffix)
     
     # Parse violation types
     types_list = [v.strip() for v in violation_types.split(",")]
     
     # Analyze
     detector = get_traffic_detector()
-    result = await detector.analyze_footage(video_path, types_list, location)
+    try:
+        result = await detector.analyze_footage(video_path, types_list, location)
+    finally:
+        os.remove(video_path)
+    get_stats_counters().increment(
+        'government_official', 'violations_detected_today', result.get('total_violations', 0)
+    )
     
     # Update government context
     try:
@@ -95,13 +108,27 @@ async def get_violation_types():
     }
 
 
+@router.get("/evidence/{violation_id}")
+async def get_violation_evidence(
+    violation_id: str,
+    auth: dict = Depends(require_gov_or_admin)
+):
+    """Serve the evidence frame captured for a violation"""
+    
+    detector = get_traffic_detector()
+    path = detector.get_evidence_path(violation_id)
+    
+    if not path:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    
+    # FileResponse streams from disk (sendfile where the server supports it)
+    return FileResponse(path, media_type="image/jpeg")
+
+
 @router.get("/stats")
-async def get_violation_stats(auth: dict = Depends(verify_role)):
+async def get_violation_stats(auth: dict = Depends(require_gov_or_admin)):
     """Get violation detection statistics"""
     
-    if auth['role'] not in ['government_official', 'admin']:
-        raise HTTPException(status_code=403, detail="Government officials only")
-    
     detector = get_traffic_detector()
     return await detector.get_violation_stats(auth['user_id'])
 
@@ -111,13 +138,10 @@ async def review_violation(
     violation_id: str,
     action: str,  # 'confirm' or 'reject'
     notes: Optional[str] = None,
-    auth: dict = Depends(verify_role)
+    auth: dict = Depends(require_gov_or_admin)
 ):
     """Review and confirm/reject a detected violation"""
     
-    if auth['role'] not in ['government_official', 'admin']:
-        raise HTTPException(status_code=403, detail="Government officials only")
-    
     if action not in ['confirm', 'reject']:
         raise HTTPException(status_code=400, detail="Action must be 'confirm' or 'reject'")
     
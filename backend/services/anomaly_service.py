@@ -4,19 +4,24 @@ Anomaly Detection Service (Sensors)
 - Sensor correlation across zones
 - Automatic alert/ticket generation
 """
+import asyncio
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Tuple
 from uuid import UUID, uuid4
 from datetime import datetime, timedelta
-from collections import defaultdict
 
-from supabase import create_client
-
-from config import SUPABASE_URL, SUPABASE_KEY
+import numpy as np
+from config import DETECTOR_CACHE_SIZE
+from services.supabase_client import get_supabase
 from services.audit_service import log_ai_decision
 from services.ticket_service import create_ticket
+from services.write_queue import get_write_queue
+from services.stats_counters import get_stats_counters
+from services.clock import now_iso
 
 # Initialize Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = get_supabase()
 
 # Sensor thresholds
 SENSOR_THRESHOLDS = {
@@ -27,26 +32,43 @@ SENSOR_THRESHOLDS = {
     "traffic": {"warning": 0.7, "critical": 0.9, "unit": "congestion"}
 }
 
+# Flattened (warning, critical, unit) per sensor type, built once at import
+_INF = float("inf")
+_TH = {
+    stype: (float(t.get("warning", _INF)), float(t.get("critical", _INF)), t.get("unit", "units"))
+    for stype, t in SENSOR_THRESHOLDS.items()
+}
+_NO_THRESHOLD = (_INF, _INF, "units")
+
+# Same thresholds as lookup tables for batch checks; unknown types use the trailing inf row
+_TYPE_INDEX = {stype: i for i, stype in enumerate(_TH)}
+_UNKNOWN_TYPE = len(_TH)
+_WARN_LUT = np.array([t[0] for t in _TH.values()] + [_INF], dtype=np.float64)
+_CRIT_LUT = np.array([t[1] for t in _TH.values()] + [_INF], dtype=np.float64)
+
 
 async def ingest_sensor_reading(
     sensor_id: str,
     sensor_type: str,
     value: float,
-    location: Optional[Dict] = None
+    location: Optional[Dict] = None,
+    threshold: Optional[Tuple[bool, Optional[str]]] = None
 ) -> Dict[str, Any]:
     """
     Ingest sensor reading and detect anomalies.
+    Pass a precomputed check_threshold() result to skip the check.
     """
     reading_id = uuid4()
     
-    # Check threshold breach
-    threshold_breach, breach_level = check_threshold(sensor_type, value)
+    # Check threshold breach (once; reused by the anomaly safety net)
+    threshold = threshold or check_threshold(sensor_type, value)
+    threshold_breach, breach_level = threshold
     
     # Detect statistical anomaly
-    anomaly_score, is_anomaly = await detect_anomaly(sensor_id, sensor_type, value)
+    anomaly_score, is_anomaly = await detect_anomaly(sensor_id, sensor_type, value, threshold)
     
     # Get unit
-    unit = SENSOR_THRESHOLDS.get(sensor_type, {}).get("unit", "units")
+    unit = _TH.get(sensor_type, _NO_THRESHOLD)[2]
     
     # Create reading record
     reading_record = {
@@ -59,10 +81,11 @@ async def ingest_sensor_reading(
         "threshold_breach": threshold_breach,
         "anomaly_score": anomaly_score,
         "anomaly_detected": is_anomaly,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": now_iso()
     }
     
-    supabase.table("sensor_readings").insert(reading_record).execute()
+    # Coalesced into multi-row inserts by the background write queue
+    await get_write_queue().enqueue("sensor_readings", reading_record)
     
     # If anomaly or critical breach, raise alert
     if is_anomaly or breach_level == "critical":
@@ -73,48 +96,136 @@ async def ingest_sensor_reading(
 
 def check_threshold(sensor_type: str, value: float) -> Tuple[bool, Optional[str]]:
     """Check if value breaches defined thresholds"""
-    thresholds = SENSOR_THRESHOLDS.get(sensor_type, {})
-    
-    if not thresholds:
-        return False, None
-    
-    if value >= thresholds.get("critical", float("inf")):
-        return True, "critical"
-    elif value >= thresholds.get("warning", float("inf")):
-        return True, "warning"
-    
-    return False, None
+    warning, critical, _ = _TH.get(sensor_type, _NO_THRESHOLD)
+    level = "critical" if value >= critical else ("warning" if value >= warning else None)
+    return level is not None, level
+
+
+def check_thresholds(sensor_types: List[str], values: List[float]) -> List[Tuple[bool, Optional[str]]]:
+    """Vectorized check_threshold over a batch of readings"""
+    types = np.fromiter(
+        (_TYPE_INDEX.get(t, _UNKNOWN_TYPE) for t in sensor_types), dtype=np.intp, count=len(sensor_types)
+    )
+    vals = np.asarray(values, dtype=np.float64)
+    critical = vals >= _CRIT_LUT[types]
+    warning = ~critical & (vals >= _WARN_LUT[types])
+    return [
+        (True, "critical") if crit else ((True, "warning") if warn else (False, None))
+        for crit, warn in zip(critical.tolist(), warning.tolist())
+    ]
+
+
+async def ingest_sensor_readings(readings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ingest a batch of sensor readings.
+    Thresholds are checked for the whole batch at once; detection stays per
+    reading since each detector's history is order-dependent.
+    """
+    thresholds = check_thresholds([r["sensor_type"] for r in readings], [r["value"] for r in readings])
+    return [
+        await ingest_sensor_reading(
+            sensor_id=r["sensor_id"],
+            sensor_type=r["sensor_type"],
+            value=r["value"],
+            location=r.get("location"),
+            threshold=threshold
+        )
+        for r, threshold in zip(readings, thresholds)
+    ]
 
 
 from sklearn.ensemble import IsolationForest
-import numpy as np
 
-# Global detector cache
-_detectors = {}
+# Global detector cache (LRU; least recently seen sensors are dropped past DETECTOR_CACHE_SIZE)
+_detectors = OrderedDict()
+_detectors_lock = threading.Lock()
+
+HISTORY_SIZE = 200
+RETRAIN_EVERY = 50
 
 class IsolationForestDetector:
     def __init__(self, sensor_id: str):
         self.sensor_id = sensor_id
         self.model = IsolationForest(contamination=0.05, random_state=42)
-        self.history = []
         self.is_fitted = False
         
-    def train(self, values: List[float]):
-        if len(values) < 10: return
-        data = np.array(values).reshape(-1, 1)
-        self.model.fit(data)
+        # Background retrain; self.model keeps serving until the new fit is swapped in
+        self._training: Optional[asyncio.Task] = None
+        
+        # Fixed ring buffer of recent readings (O(1) push, no list shifting)
+        self.buf = np.empty((HISTORY_SIZE, 1), dtype=np.float64)
+        self.idx = 0
+        self.count = 0
+        self.seen = 0
+        
+        # Reused 1x1 input for single-value scoring
+        self._query = np.empty((1, 1), dtype=np.float64)
+    
+    @property
+    def history(self) -> np.ndarray:
+        """Buffered readings as an (n, 1) view (not in arrival order once wrapped)"""
+        return self.buf[:self.count]
+    
+    def push(self, value: float):
+        self.buf[self.idx, 0] = value
+        self.idx = (self.idx + 1) % HISTORY_SIZE
+        self.count = min(self.count + 1, HISTORY_SIZE)
+        self.seen += 1
+    
+    def load_history(self, values: List[float]):
+        """Replace the buffer with the most recent values"""
+        recent = np.asarray(values[-HISTORY_SIZE:], dtype=np.float64)
+        self.count = len(recent)
+        self.buf[:self.count, 0] = recent
+        self.idx = self.count % HISTORY_SIZE
+        
+    @staticmethod
+    def _fit_snapshot(data: np.ndarray) -> IsolationForest:
+        """Fit a fresh model on a private copy of the readings"""
+        model = IsolationForest(contamination=0.05, random_state=42)
+        model.fit(data)
+        return model
+        
+    def train(self, values: Optional[List[float]] = None):
+        # IsolationForest is order-invariant, so the buffer view can be fed as-is
+        data = self.history if values is None else np.asarray(values, dtype=np.float64).reshape(-1, 1)
+        if len(data) < 10: return
+        self.model = self._fit_snapshot(data)
+        self.is_fitted = True
+    
+    @property
+    def training(self) -> bool:
+        return self._training is not None and not self._training.done()
+        
+    def train_in_background(self):
+        """Fit on a snapshot of the buffer in a worker thread, then swap the model in"""
+        if self.training or self.count < 10:
+            return
+        snapshot = self.history.copy()
+        self._training = asyncio.create_task(asyncio.to_thread(self._fit_snapshot, snapshot))
+        self._training.add_done_callback(self._swap_model)
+    
+    def _swap_model(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            print(f"Warning: Retrain failed for sensor {self.sensor_id}: {task.exception()}")
+            return
+        self.model = task.result()
         self.is_fitted = True
         
     def score(self, value: float) -> Tuple[float, bool]:
         if not self.is_fitted:
             # Fallback to simple outlier logic if not fitted
-            if self.history:
-                mean = sum(self.history)/len(self.history)
+            if self.count:
+                mean = float(self.history.mean())
                 return (1.0 if abs(value - mean) > mean*0.5 else 0.0), abs(value - mean) > mean*0.5
             return 0.0, False
-            
-        pred = self.model.predict([[value]])[0] # -1 for anomaly
-        decision = self.model.decision_function([[value]])[0]
+        
+        self._query[0, 0] = value
+        decision = self.model.decision_function(self._query)[0]
+        # predict() is just decision < 0 -> -1, so derive it instead of a second pass
+        pred = -1 if decision < 0 else 1
         # Normalize decision to 0-1
         # decision is usually negative for anomalies
         anomaly_score = 0.5 - (decision / 2.0)
@@ -122,34 +233,42 @@ class IsolationForestDetector:
         return anomaly_score, pred == -1
 
 def get_detector(sensor_id: str) -> IsolationForestDetector:
-    if sensor_id not in _detectors:
-        _detectors[sensor_id] = IsolationForestDetector(sensor_id)
-    return _detectors[sensor_id]
+    # Lookup + insert + eviction must be atomic so threaded callers never build two detectors
+    with _detectors_lock:
+        detector = _detectors.get(sensor_id)
+        if detector is not None:
+            _detectors.move_to_end(sensor_id)
+            return detector
+        
+        detector = _detectors[sensor_id] = IsolationForestDetector(sensor_id)
+        if len(_detectors) > DETECTOR_CACHE_SIZE:
+            _detectors.popitem(last=False)
+        return detector
 
 async def detect_anomaly(
     sensor_id: str,
     sensor_type: str,
-    value: float
+    value: float,
+    threshold: Optional[Tuple[bool, Optional[str]]] = None
 ) -> Tuple[float, bool]:
     """
     Detect anomaly using online Isolation Forest + history buffer.
+    Pass a precomputed check_threshold() result to avoid re-checking.
     """
     detector = get_detector(sensor_id)
     
     # Add to history
-    detector.history.append(value)
-    if len(detector.history) > 200:
-        detector.history.pop(0)
+    detector.push(value)
         
-    # Auto-train periodically
-    if len(detector.history) >= 20 and (not detector.is_fitted or len(detector.history) % 50 == 0):
-        detector.train(detector.history)
+    # Auto-train periodically (off the event loop; scoring uses the current model meanwhile)
+    if detector.count >= 20 and (not detector.is_fitted or detector.seen % RETRAIN_EVERY == 0):
+        detector.train_in_background()
     
     # Predict
     anomaly_score, is_anomaly = detector.score(value)
     
     # Check simple thresholds as safety net
-    threshold_breach, level = check_threshold(sensor_type, value)
+    threshold_breach, level = threshold or check_threshold(sensor_type, value)
     if threshold_breach and level == "critical":
         is_anomaly = True
         anomaly_score = max(anomaly_score, 0.9)
@@ -164,48 +283,66 @@ async def correlate_sensors(zone_id: str) -> Dict[str, Any]:
     # Get recent readings for zone
     one_hour_ago = (datetime.utcnow() - timedelta(hours=1)).isoformat()
     
-    readings = supabase.table("sensor_readings").select("*").contains(
-        "location", {"zone": zone_id}
-    ).gte("created_at", one_hour_ago).execute()
+    # Grouped in Postgres (setup/migrations/003_zone_sensor_summary.sql): one row per sensor type
+    try:
+        result = supabase.rpc("zone_sensor_summary", {"p_zone": zone_id, "p_since": one_hour_ago}).execute()
+        summary = result.data or []
+    except Exception as e:
+        print(f"Zone summary RPC unavailable, grouping in Python: {e}")
+        summary = _summarize_zone(zone_id, one_hour_ago)
     
-    if not readings.data:
+    if not summary:
         return {
             "zone_id": zone_id,
             "status": "no_data",
             "correlated_anomalies": []
         }
     
-    # Group by sensor type
-    by_type = defaultdict(list)
-    anomalies_by_type = defaultdict(list)
-    
-    for reading in readings.data:
-        sensor_type = reading.get("sensor_type")
-        by_type[sensor_type].append(reading)
-        if reading.get("anomaly_detected"):
-            anomalies_by_type[sensor_type].append(reading)
+    anomalous = [row for row in summary if row["anomaly_count"]]
     
     # Check for correlated anomalies (multiple types showing anomalies)
     correlated = []
-    if len(anomalies_by_type) >= 2:
+    if len(anomalous) >= 2:
         # Multiple sensor types showing anomalies - likely real event
         correlated = [
             {
-                "sensor_type": stype,
-                "count": len(readings),
-                "latest_value": readings[-1]["value"] if readings else None
+                "sensor_type": row["sensor_type"],
+                "count": row["anomaly_count"],
+                "latest_value": row["latest_anomaly_value"]
             }
-            for stype, readings in anomalies_by_type.items()
+            for row in anomalous
         ]
     
     return {
         "zone_id": zone_id,
         "status": "correlated_anomaly" if correlated else "normal",
-        "sensor_types_active": list(by_type.keys()),
+        "sensor_types_active": [row["sensor_type"] for row in summary],
         "correlated_anomalies": correlated
     }
 
 
+def _summarize_zone(zone_id: str, since: str) -> List[Dict[str, Any]]:
+    """Python fallback for the zone_sensor_summary RPC"""
+    readings = supabase.table("sensor_readings").select("sensor_type, value, anomaly_detected").contains(
+        "location", {"zone": zone_id}
+    ).gte("created_at", since).order("created_at", desc=False).execute()
+    
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for reading in readings.data or []:
+        row = by_type.setdefault(reading.get("sensor_type"), {
+            "sensor_type": reading.get("sensor_type"),
+            "reading_count": 0,
+            "anomaly_count": 0,
+            "latest_anomaly_value": None
+        })
+        row["reading_count"] += 1
+        if reading.get("anomaly_detected"):
+            row["anomaly_count"] += 1
+            row["latest_anomaly_value"] = reading["value"]
+    
+    return list(by_type.values())
+
+
 async def raise_alert(reading: Dict, breach_level: str) -> Dict:
     """Create alert ticket for anomalous reading"""
     sensor_type = reading.get("sensor_type", "unknown")
@@ -248,10 +385,12 @@ Please investigate and take appropriate action.
         source_ref_id=UUID(reading.get("id"))
     )
     
+    get_stats_counters().increment('government_official', 'active_alerts')
+    
     return {
         "alert_created": True,
         "ticket_id": ticket.get("id"),
-        "decision_id": str(decision_id)
+        "decision_id": str(decision_id) if decision_id else None
     }
 
 
@@ -259,23 +398,44 @@ async def get_sensor_baseline(sensor_id: str, hours: int = 24) -> Dict[str, Any]
     """Get historical baseline for a sensor"""
     cutoff = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
     
+    # Aggregated in Postgres (setup/migrations/002_sensor_baseline.sql): one row back, not every reading
+    try:
+        result = supabase.rpc("sensor_baseline", {"p_sensor_id": sensor_id, "p_since": cutoff}).execute()
+        stats = result.data[0] if result.data else None
+    except Exception as e:
+        print(f"Baseline RPC unavailable, aggregating in Python: {e}")
+        stats = _aggregate_baseline(sensor_id, cutoff)
+    
+    if not stats or not stats["reading_count"]:
+        return {"sensor_id": sensor_id, "status": "no_data"}
+    
+    return {
+        "sensor_id": sensor_id,
+        "period_hours": hours,
+        "reading_count": stats["reading_count"],
+        "mean": stats["mean"],
+        "min": stats["min"],
+        "max": stats["max"],
+        "latest": stats["latest"]
+    }
+
+
+def _aggregate_baseline(sensor_id: str, cutoff: str) -> Optional[Dict[str, Any]]:
+    """Python fallback for the sensor_baseline RPC"""
     readings = supabase.table("sensor_readings").select("value, created_at").eq(
         "sensor_id", sensor_id
     ).gte("created_at", cutoff).order("created_at", desc=False).execute()
     
     if not readings.data:
-        return {"sensor_id": sensor_id, "status": "no_data"}
+        return None
     
     values = [r["value"] for r in readings.data]
-    
     return {
-        "sensor_id": sensor_id,
-        "period_hours": hours,
         "reading_count": len(values),
         "mean": sum(values) / len(values),
         "min": min(values),
         "max": max(values),
-        "latest": values[-1] if values else None
+        "latest": values[-1]
     }
 
 
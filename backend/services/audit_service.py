@@ -2,26 +2,114 @@
 Audit Service - Logs all AI decisions and generates evidence bundles
 CRITICAL: All AI services MUST use this for output logging
 """
+import asyncio
 import hashlib
-import json
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import random
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID, uuid4
 
-from supabase import create_client
+import orjson
 from config import (
-    SUPABASE_URL, SUPABASE_KEY, 
-    CONFIDENCE_THRESHOLD_LOW, ENABLE_ACTIVE_LEARNING
+    CONFIDENCE_THRESHOLD_LOW, ENABLE_ACTIVE_LEARNING, AUDIT_SAMPLE_RATE
 )
+from services.supabase_client import get_supabase
+from services.write_queue import get_write_queue
+from services.stats_counters import get_stats_counters
+from services.clock import now_iso
 
 # Initialize Supabase client
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = get_supabase()
+
+
+class DecisionLoader:
+    """
+    DataLoader-style batcher for ai_decisions lookups.
+    Concurrent load() calls within a 10ms window are coalesced into one
+    `.in_("id", ids)` query (up to 100 ids per query).
+    """
+
+    MAX_BATCH_SIZE = 100
+    BATCH_WINDOW_SECONDS = 0.01
+
+    def __init__(self):
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def load(self, decision_id: UUID) -> Optional[Dict]:
+        """Fetch one decision row (None if it doesn't exist)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(str(decision_id), []).append(future)
+
+        if len(self._pending) >= self.MAX_BATCH_SIZE:
+            self._schedule_flush(loop, 0)
+        elif self._flush_handle is None:
+            self._schedule_flush(loop, self.BATCH_WINDOW_SECONDS)
+
+        return await future
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, delay: float) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = loop.call_later(delay, lambda: asyncio.ensure_future(self._flush()))
+
+    async def _flush(self) -> None:
+        self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        ids = list(batch)
+
+        for start in range(0, len(ids), self.MAX_BATCH_SIZE):
+            chunk = ids[start:start + self.MAX_BATCH_SIZE]
+            try:
+                rows = await asyncio.to_thread(self._fetch, chunk)
+            except Exception as e:
+                for decision_id in chunk:
+                    for future in batch[decision_id]:
+                        if not future.done():
+                            future.set_exception(e)
+                continue
+
+            by_id = {row["id"]: row for row in rows}
+            for decision_id in chunk:
+                for future in batch[decision_id]:
+                    if not future.done():
+                        future.set_result(by_id.get(decision_id))
+
+    @staticmethod
+    def _fetch(ids: List[str]) -> List[Dict]:
+        result = supabase.table("ai_decisions").select("*").in_("id", ids).execute()
+        return result.data or []
+
+
+_decision_loader = None
+
+def get_decision_loader() -> DecisionLoader:
+    """Get singleton decision loader instance"""
+    global _decision_loader
+    if _decision_loader is None:
+        _decision_loader = DecisionLoader()
+    return _decision_loader
+
+
+_LINEAGE_COLUMNS = "id,model_name,model_version,module,confidence,parent_decision_id,created_at"
+
+
+_HASH_JSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def serialize_input(input_data: Any) -> bytes:
+    """Canonical JSON bytes for an AI input (shared by the hash and the summary)"""
+    # orjson emits canonical (sorted, compact) bytes directly, skipping the Python encoder
+    return orjson.dumps(input_data, option=_HASH_JSON_OPTIONS, default=str)
 
 
 def compute_input_hash(input_data: Any) -> str:
     """Compute SHA256 hash of input for reproducibility"""
-    serialized = json.dumps(input_data, sort_keys=True, default=str)
-    return hashlib.sha256(serialized.encode()).hexdigest()
+    return hashlib.sha256(serialize_input(input_data)).hexdigest()
+
+
+def _insert_record(table: str, record: Dict) -> None:
+    supabase.table(table).insert(record).execute()
 
 
 async def log_ai_decision(
@@ -36,25 +124,34 @@ async def log_ai_decision(
     parent_decision_id: Optional[UUID] = None,
     evidence: Optional[List[Dict]] = None,
     explanation: Optional[str] = None
-) -> UUID:
+) -> Optional[UUID]:
     """
     Log an AI decision to the audit table.
-    Returns the decision ID for reference.
+    Returns the decision ID for reference, or None when the decision was sampled
+    out (only counted), so callers must not store or expose an ID then.
     
     This function MUST be called by every AI service after inference.
     """
-    decision_id = uuid4()
-    
     # Determine if human review is required based on confidence
     requires_human_review = confidence < CONFIDENCE_THRESHOLD_LOW
     
+    # Decisions needing review are always stored; the rest may be sampled down to a rollup count
+    if not requires_human_review and AUDIT_SAMPLE_RATE < 1.0 and random.random() >= AUDIT_SAMPLE_RATE:
+        await _count_skipped_decision(model_name, module)
+        return None
+    
+    decision_id = uuid4()
+    
+    # One serialization pass feeds both the hash and the (truncated) summary
+    serialized = serialize_input(input_data)
+    
     record = {
         "id": str(decision_id),
         "model_name": model_name,
         "model_version": model_version,
         "module": module,
-        "input_hash": compute_input_hash(input_data),
-        "input_summary": str(input_data)[:500],  # Truncate for readability
+        "input_hash": hashlib.sha256(serialized).hexdigest(),
+        "input_summary": serialized[:500].decode("utf-8", "ignore"),  # Truncate for readability
         "source_document_id": str(source_document_id) if source_document_id else None,
         "vector_ids": [str(v) for v in vector_ids] if vector_ids else None,
         "parent_decision_id": str(parent_decision_id) if parent_decision_id else None,
@@ -63,11 +160,13 @@ async def log_ai_decision(
         "evidence": evidence,
         "explanation": explanation,
         "requires_human_review": requires_human_review,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": now_iso()
     }
     
-    # Insert decision record
-    supabase.table("ai_decisions").insert(record).execute()
+    # Insert decision record (direct: the audit trail must not be lost or lag the caller)
+    await asyncio.to_thread(_insert_record, "ai_decisions", record)
+    if requires_human_review:
+        get_stats_counters().increment('government_official', 'pending_reviews')
     
     # Queue for active learning if low confidence
     if ENABLE_ACTIVE_LEARNING and requires_human_review:
@@ -76,6 +175,40 @@ async def log_ai_decision(
     return decision_id
 
 
+# Sampled-out decision counts, keyed by (month, model_name, module)
+_skipped_decisions: Dict[Tuple[str, str, str], int] = {}
+_skipped_total = 0
+_COUNTER_FLUSH_EVERY = 100
+
+
+async def _count_skipped_decision(model_name: str, module: str) -> None:
+    global _skipped_total
+    key = (now_iso()[:7] + "-01", model_name, module)
+    _skipped_decisions[key] = _skipped_decisions.get(key, 0) + 1
+    _skipped_total += 1
+    if _skipped_total >= _COUNTER_FLUSH_EVERY:
+        await flush_decision_counters()
+
+
+async def flush_decision_counters() -> None:
+    """Add pending sampled-out counts to ai_decision_counters (setup/migrations/004_ai_decision_counters.sql)"""
+    global _skipped_decisions, _skipped_total
+    if not _skipped_decisions:
+        return
+    pending, _skipped_decisions, _skipped_total = _skipped_decisions, {}, 0
+    
+    rows = [
+        {"month": month, "model_name": model_name, "module": module, "count": count}
+        for (month, model_name, module), count in pending.items()
+    ]
+    try:
+        await asyncio.to_thread(
+            lambda: supabase.rpc("bump_ai_decision_counters", {"p_rows": rows}).execute()
+        )
+    except Exception as e:
+        print(f"Warning: Failed to flush decision counters: {e}")
+
+
 async def queue_for_learning(
     decision_id: UUID,
     model_name: str,
@@ -88,9 +221,9 @@ async def queue_for_learning(
         "model_name": model_name,
         "reason": reason,
         "processed": False,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": now_iso()
     }
-    supabase.table("learning_queue").insert(record).execute()
+    await get_write_queue().enqueue("learning_queue", record)
 
 
 async def record_human_override(
@@ -101,28 +234,35 @@ async def record_human_override(
     corrected_output: Optional[Dict] = None
 ) -> None:
     """Record a human override of an AI decision"""
+    original = await get_decision_loader().load(decision_id)
+    
     # Update the AI decision record
     supabase.table("ai_decisions").update({
         "human_reviewed": True,
         "human_reviewer_id": str(reviewer_id),
         "human_decision": decision,
         "human_notes": notes,
-        "reviewed_at": datetime.utcnow().isoformat()
+        "reviewed_at": now_iso()
     }).eq("id", str(decision_id)).execute()
     
+    # First review of a flagged decision clears it from the dashboard's pending count
+    if original and original.get("requires_human_review") and not original.get("human_reviewed"):
+        get_stats_counters().decrement('government_official', 'pending_reviews')
+    
     # If modified, create training sample
     if decision == "modified" and corrected_output:
-        original = supabase.table("ai_decisions").select("*").eq("id", str(decision_id)).single().execute()
+        if not original:
+            raise ValueError(f"Decision {decision_id} not found")
         
         training_record = {
             "id": str(uuid4()),
             "decision_id": str(decision_id),
-            "model_name": original.data["model_name"],
-            "input_data": {"hash": original.data["input_hash"]},
-            "original_output": original.data["output"],
+            "model_name": original["model_name"],
+            "input_data": {"hash": original["input_hash"]},
+            "original_output": original["output"],
             "corrected_output": corrected_output,
             "corrected_by": str(reviewer_id),
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": now_iso()
         }
         supabase.table("training_samples").insert(training_record).execute()
 
@@ -130,18 +270,18 @@ async def record_human_override(
 async def generate_evidence_bundle(decision_id: UUID, bundle_type: str = "json") -> Dict:
     """Generate exportable evidence bundle for a decision"""
     # Fetch decision with full context
-    decision = supabase.table("ai_decisions").select("*").eq("id", str(decision_id)).single().execute()
+    decision = await get_decision_loader().load(decision_id)
     
-    if not decision.data:
+    if not decision:
         raise ValueError(f"Decision {decision_id} not found")
     
     bundle = {
         "bundle_id": str(uuid4()),
         "decision_id": str(decision_id),
-        "generated_at": datetime.utcnow().isoformat(),
-        "decision": decision.data,
+        "generated_at": now_iso(),
+        "decision": decision,
         "lineage": await get_decision_lineage(decision_id),
-        "evidence": decision.data.get("evidence", [])
+        "evidence": decision.get("evidence", [])
     }
     
     # Store bundle reference
@@ -150,7 +290,7 @@ async def generate_evidence_bundle(decision_id: UUID, bundle_type: str = "json")
         "decision_id": str(decision_id),
         "bundle_type": bundle_type,
         "metadata": bundle,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": now_iso()
     }
     supabase.table("evidence_bundles").insert(bundle_record).execute()
     
@@ -159,23 +299,34 @@ async def generate_evidence_bundle(decision_id: UUID, bundle_type: str = "json")
 
 async def get_decision_lineage(decision_id: UUID) -> List[Dict]:
     """Get full lineage chain for a decision (provenance)"""
+    # One round-trip via the recursive CTE (setup/migrations/001_decision_lineage.sql)
+    try:
+        result = supabase.rpc("get_decision_lineage", {"root": str(decision_id)}).execute()
+        return result.data or []
+    except Exception as e:
+        print(f"Lineage RPC unavailable, walking chain: {e}")
+    
+    # Each hop depends on the previous one, so nothing would batch: direct narrow selects
     lineage = []
     current_id = decision_id
     
     while current_id:
-        decision = supabase.table("ai_decisions").select(
-            "id, model_name, model_version, module, confidence, parent_decision_id, created_at"
-        ).eq("id", str(current_id)).single().execute()
+        decision = await asyncio.to_thread(_fetch_lineage_row, str(current_id))
         
-        if not decision.data:
+        if not decision:
             break
             
-        lineage.append(decision.data)
-        current_id = decision.data.get("parent_decision_id")
+        lineage.append(decision)
+        current_id = decision.get("parent_decision_id")
     
     return lineage
 
 
+def _fetch_lineage_row(decision_id: str) -> Optional[Dict]:
+    result = supabase.table("ai_decisions").select(_LINEAGE_COLUMNS).eq("id", decision_id).limit(1).execute()
+    return result.data[0] if result.data else None
+
+
 async def log_audit_event(
     action: str,
     entity_type: str,
@@ -191,6 +342,6 @@ async def log_audit_event(
         "entity_id": str(entity_id),
         "actor_id": str(actor_id) if actor_id else None,
         "details": details,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": now_iso()
     }
-    supabase.table("audit_logs").insert(record).execute()
+    await asyncio.to_thread(_insert_record, "audit_logs", record)
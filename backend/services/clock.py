@@ -0,0 +1,22 @@
+"""
+Cheap ISO-8601 timestamps for insert records
+Formats the date/time prefix once per second and only appends microseconds,
+instead of building a datetime and running isoformat() on every row.
+"""
+import time
+from datetime import datetime
+
+# [second, prefix] per clock; "utc" matches datetime.utcnow(), "local" datetime.now()
+_PREFIX_CACHE = {"utc": [-1, ""], "local": [-1, ""]}
+
+
+def now_iso(utc: bool = True) -> str:
+    """Current time as 'YYYY-MM-DDTHH:MM:SS.ffffff' (UTC by default, naive like utcnow())"""
+    t = time.time()
+    second = int(t)
+    cached = _PREFIX_CACHE["utc" if utc else "local"]
+    if cached[0] != second:
+        dt = datetime.utcfromtimestamp(second) if utc else datetime.fromtimestamp(second)
+        cached[0] = second
+        cached[1] = dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return f"{cached[1]}.{int((t - second) * 1_000_000):06d}"
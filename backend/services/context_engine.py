@@ -3,13 +3,17 @@ Unified Context Engine for C.I.T.A.D.E.L.
 Manages user context across all modules for session-aware intelligence.
 """
 
+import asyncio
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from uuid import uuid4
 
-from supabase import create_client
-from config import SUPABASE_URL, SUPABASE_KEY
+from services.supabase_client import get_supabase
+from services.clock import now_iso
+
+# Bursts of add_* updates within this window collapse into one upsert
+SAVE_DEBOUNCE_SECONDS = 0.15
 
 
 class CitizenContext(BaseModel):
@@ -61,6 +65,18 @@ class GovernmentContext(BaseModel):
     active_alerts: List[Dict[str, Any]] = Field(default_factory=list)
     
     last_updated: datetime = Field(default_factory=datetime.now)
+    
+    # Lowercased search text per entry, keyed by list field (not persisted)
+    _search_text: Dict[str, List[str]] = PrivateAttr(default_factory=dict)
+    
+    def search_texts(self, field: str, key: str, default: Any = '') -> List[str]:
+        """Lowercased str(entry[key]) for each entry in `field`, extended as entries are appended"""
+        items = getattr(self, field)
+        texts = self._search_text.setdefault(field, [])
+        if len(texts) > len(items):
+            texts.clear()
+        texts.extend(str(item.get(key, default)).lower() for item in items[len(texts):])
+        return texts
 
 
 class ContextEngine:
@@ -70,7 +86,11 @@ class ContextEngine:
     """
     
     def __init__(self, supabase_client=None):
-        self.supabase = supabase_client or create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase = supabase_client or get_supabase()
+        
+        # Dirty contexts awaiting a debounced save, keyed by session_id
+        self._dirty: Dict[str, Union[CitizenContext, GovernmentContext]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
     
     async def get_context(
         self, 
@@ -83,6 +103,12 @@ class ContextEngine:
         if not session_id:
             session_id = str(uuid4())
         
+        # Unsaved in-memory state is newer than the stored row (same user/role checks as the query below)
+        dirty = self._dirty.get(session_id)
+        context_type = CitizenContext if role == "citizen" else GovernmentContext
+        if dirty is not None and dirty.user_id == user_id and type(dirty) is context_type:
+            return dirty
+        
         try:
             result = self.supabase.table('chat_sessions')\
                 .select('*')\
@@ -112,20 +138,44 @@ class ContextEngine:
     async def save_context(self, context: Union[CitizenContext, GovernmentContext]):
         """Persist context to database"""
         try:
-            # Convert datetime to string for JSON
-            context_dict = context.model_dump()
-            context_dict['last_updated'] = context_dict['last_updated'].isoformat()
+            # mode='json' emits JSON-ready values (datetimes as ISO strings) in one pass
+            context_dict = context.model_dump(mode='json')
             
             self.supabase.table('chat_sessions').upsert({
                 'id': context.session_id,
                 'user_id': context.user_id,
                 'session_type': context.role,
                 'context_data': context_dict,
-                'updated_at': datetime.now().isoformat()
+                'updated_at': now_iso(utc=False)
             }).execute()
         except Exception as e:
             print(f"Warning: Failed to save context: {e}")
     
+    def mark_dirty(self, context: Union[CitizenContext, GovernmentContext]):
+        """Schedule a debounced save; repeated calls within the window share one upsert"""
+        self._dirty[context.session_id] = context
+        if context.session_id not in self._flush_tasks:
+            self._flush_tasks[context.session_id] = asyncio.create_task(
+                self._debounced_flush(context.session_id)
+            )
+    
+    async def _debounced_flush(self, session_id: str):
+        await asyncio.sleep(SAVE_DEBOUNCE_SECONDS)
+        # Detach before saving so updates made during the upsert schedule a new flush
+        self._flush_tasks.pop(session_id, None)
+        context = self._dirty.pop(session_id, None)
+        if context is not None:
+            await self.save_context(context)
+    
+    async def flush_pending(self):
+        """Save every dirty context now (used on shutdown)"""
+        for task in list(self._flush_tasks.values()):
+            task.cancel()
+        self._flush_tasks.clear()
+        dirty, self._dirty = self._dirty, {}
+        for context in dirty.values():
+            await self.save_context(context)
+    
     async def update_rag_history(
         self, 
         context: CitizenContext, 
@@ -137,11 +187,11 @@ class ContextEngine:
         context.rag_queries.append({
             'query': query,
             'response': response[:500],  # Truncate for storage
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso(utc=False)
         })
         context.rag_cited_documents.extend(sources)
         context.last_updated = datetime.now()
-        await self.save_context(context)
+        self.mark_dirty(context)
     
     async def add_processed_document(
         self, 
@@ -156,9 +206,9 @@ class ContextEngine:
                 'doc_id': doc_id,
                 'doc_type': doc_type,
                 'extracted_data': extracted_data,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso(utc=False)
             })
-            await self.save_context(context)
+            self.mark_dirty(context)
     
     async def add_ticket(self, context: CitizenContext, ticket_id: str, category: str):
         """Called by Ticket Analyzer after creating ticket"""
@@ -167,9 +217,9 @@ class ContextEngine:
             context.ticket_history.append({
                 'ticket_id': ticket_id,
                 'category': category,
-                'created_at': datetime.now().isoformat()
+                'created_at': now_iso(utc=False)
             })
-            await self.save_context(context)
+            self.mark_dirty(context)
     
     async def add_violation(
         self, 
@@ -184,9 +234,9 @@ class ContextEngine:
                 'violation_id': violation_id,
                 'type': violation_type,
                 'confidence': confidence,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso(utc=False)
             })
-            await self.save_context(context)
+            self.mark_dirty(context)
     
     async def cross_reference_data(
         self, 
@@ -202,22 +252,24 @@ class ContextEngine:
         related_data = {}
         
         if isinstance(context, GovernmentContext):
+            needle = entity_value.lower()
+            
             # Check if this address has anomalies
             related_data['anomalies'] = [
-                alert for alert in context.active_alerts 
-                if entity_value.lower() in str(alert.get('location', '')).lower()
+                alert for alert, text in zip(context.active_alerts, context.search_texts('active_alerts', 'location'))
+                if needle in text
             ]
             
             # Check if this location has traffic violations
             related_data['violations'] = [
-                v for v in context.detected_violations 
-                if entity_value.lower() in str(v.get('location', '')).lower()
+                v for v, text in zip(context.detected_violations, context.search_texts('detected_violations', 'location'))
+                if needle in text
             ]
             
             # Check processed documents for this entity
             related_data['documents'] = [
-                doc for doc in context.processed_documents
-                if entity_value.lower() in str(doc.get('extracted_data', {})).lower()
+                doc for doc, text in zip(context.processed_documents, context.search_texts('processed_documents', 'extracted_data', {}))
+                if needle in text
             ]
         
         return related_data
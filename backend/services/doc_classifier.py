@@ -6,10 +6,19 @@ Categories:
 letter, form, email, handwritten, advertisement, scientific report, scientific publication,
 specification, file folder, news article, budget, invoice, presentation, questionnaire, resume, memo
 """
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 from typing import List, Tuple, Dict
 
+from config import EMBEDDING_MODEL, ENABLE_CLASSIFIER_CACHE, CLASSIFIER_CACHE_SIZE, CLASSIFIER_ONNX_DIR
+from services.onnx_encoder import load_onnx_encoder
+from services.embedding_model import get_embedding_model
+
 # RVL-CDIP Classes
 CLASSES = [
     "letter", "form", "email", "handwritten", "advertisement", 
@@ -39,17 +48,63 @@ PROTOTYPES = {
     "memo": "MEMORANDUM. To: All Staff. From: Management. Date: Today. Subject: Policy Change. Internal comms."
 }
 
+# Precomputed prototype embeddings (built by setup/build_classifier_prototypes.py)
+PROTOTYPE_ARTIFACT = Path(__file__).resolve().parent.parent / "data" / "processed" / "doc_classifier_prototypes.npz"
+
+
+def prototype_digest() -> str:
+    """Fingerprint of the prototype texts; a stale artifact is ignored"""
+    joined = "\n".join(f"{name}\t{text}" for name, text in PROTOTYPES.items())
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
 class DocumentClassifier:
-    def __init__(self, model: SentenceTransformer):
+    def __init__(self, model: SentenceTransformer, model_id: str = EMBEDDING_MODEL):
         self.model = model
-        self._embed_prototypes()
+        self.model_id = model_id
+        if not self._load_prototypes():
+            self._embed_prototypes()
+        
+        # Results keyed on a digest of the classified text (duplicate uploads skip encoding);
+        # classify() runs in worker threads, so the LRU is guarded
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         
     def _embed_prototypes(self):
-        """Compute embeddings for class prototypes"""
+        """Compute L2-normalized embeddings for class prototypes (16 x dim matrix)"""
         print("Embedding classification prototypes...")
         self.class_names = list(PROTOTYPES.keys())
         self.texts = list(PROTOTYPES.values())
-        self.embeddings = self.model.encode(self.texts, convert_to_tensor=True)
+        self.embeddings = self.model.encode(
+            self.texts, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+    
+    def _load_prototypes(self, path: Path = PROTOTYPE_ARTIFACT) -> bool:
+        """Load prototype embeddings from the artifact if it matches this encoder and PROTOTYPES"""
+        if not path.exists():
+            return False
+        try:
+            data = np.load(path)
+            if str(data["model_id"]) != self.model_id or str(data["digest"]) != prototype_digest():
+                return False
+            self.class_names = [str(name) for name in data["class_names"]]
+            self.texts = [PROTOTYPES[name] for name in self.class_names]
+            self.embeddings = data["embeddings"].astype(np.float32, copy=False)
+        except Exception as e:
+            print(f"Warning: Ignoring prototype artifact {path}: {e}")
+            return False
+        print("Loaded classification prototypes from artifact")
+        return True
+    
+    def save_prototypes(self, path: Path = PROTOTYPE_ARTIFACT):
+        """Write the current prototype embeddings as a reusable artifact"""
+        np.savez_compressed(
+            path,
+            model_id=np.array(self.model_id),
+            digest=np.array(prototype_digest()),
+            class_names=np.array(self.class_names),
+            embeddings=self.embeddings
+        )
         
     def classify(self, text: str) -> Tuple[str, float]:
         """
@@ -58,17 +113,39 @@ class DocumentClassifier:
         """
         if not text or len(text.strip()) < 5:
             return "unknown", 0.0
-            
-        # Embed input text
+        
         # Use first 512 chars as that's often enough for classification locally
-        doc_embedding = self.model.encode(text[:1000], convert_to_tensor=True)
+        snippet = text[:1000]
+        
+        if not ENABLE_CLASSIFIER_CACHE:
+            return self._classify_uncached(snippet)
         
-        # Compute cosine similarity
-        cosine_scores = util.pytorch_cos_sim(doc_embedding, self.embeddings)[0]
+        key = hashlib.blake2b(snippet.encode("utf-8"), digest_size=16).digest()
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        
+        result = self._classify_uncached(snippet)
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > CLASSIFIER_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+    
+    def _classify_uncached(self, snippet: str) -> Tuple[str, float]:
+        # Embed input text (encode already returns float32 numpy; no tensor hop or extra copy)
+        doc_embedding = self.model.encode(
+            snippet, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32, copy=False)
+        
+        # Both sides are unit-length, so cosine similarity is a single GEMV
+        cosine_scores = self.embeddings @ doc_embedding
         
         # Find best match
-        best_score_idx = np.argmax(cosine_scores.cpu().numpy())
-        best_score = cosine_scores[best_score_idx].item()
+        best_score_idx = int(cosine_scores.argmax())
+        best_score = float(cosine_scores[best_score_idx])
         predicted_class = self.class_names[best_score_idx]
         
         # Normalize score (cosine is -1 to 1, usually 0 to 1 for text)
@@ -78,12 +155,26 @@ class DocumentClassifier:
 
 # Global Instance
 _classifier = None
+_classifier_lock = threading.Lock()
+
+def load_encoder(model=None) -> Tuple[object, str]:
+    """Pick the classifier encoder and the id its prototype embeddings are keyed on"""
+    # Prefer the int8 ONNX encoder when it has been exported; prototypes are
+    # embedded with the same encoder, so scores stay comparable
+    encoder = load_onnx_encoder(CLASSIFIER_ONNX_DIR)
+    if encoder is not None:
+        print("Document classifier: using int8 ONNX encoder")
+        return encoder, f"onnx-int8:{EMBEDDING_MODEL}"
+    if model is None:
+        # Lazy load if not provided
+        return get_embedding_model("all-mpnet-base-v2"), "all-mpnet-base-v2"
+    return model, EMBEDDING_MODEL
 
 def get_classifier(model=None):
     global _classifier
     if _classifier is None:
-        if model is None:
-             # Lazy load if not provided
-             model = SentenceTransformer("all-mpnet-base-v2")
-        _classifier = DocumentClassifier(model)
+        with _classifier_lock:
+            if _classifier is None:
+                encoder, model_id = load_encoder(model)
+                _classifier = DocumentClassifier(encoder, model_id)
     return _classifier
@@ -5,25 +5,27 @@ Document Intelligence Service
 - PII detection & redaction
 - Embedding generation for Vector DB
 """
+import asyncio
 import re
 from typing import Dict, List, Optional, Tuple, Any
 from uuid import UUID, uuid4
 from datetime import datetime
 
-from supabase import create_client
-from sentence_transformers import SentenceTransformer
-
 from config import (
-    SUPABASE_URL, SUPABASE_KEY,
-    EMBEDDING_MODEL, EMBEDDING_DIMENSION,
+    EMBEDDING_DIMENSION,
     ENABLE_PII_DETECTION
 )
+from services.supabase_client import get_supabase
 from services.audit_service import log_ai_decision, log_audit_event
 from services.doc_classifier import get_classifier
+from services.device import ocr_use_gpu
+from services.embedding_model import get_embedding_model, get_query_encoder
+from services.ocr_pool import get_ocr_pool, load_ocr_image, read_lines_in_pool
+from services.fast_regex import compile_pattern
 
 # Initialize clients
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+supabase = get_supabase()
+embedding_model = get_embedding_model()
 
 # Initialize classifier
 classifier = get_classifier(embedding_model)
@@ -31,11 +33,14 @@ classifier = get_classifier(embedding_model)
 # Try loading EasyOCR
 try:
     import easyocr
-    ocr_reader = easyocr.Reader(['en'], gpu=False) # CPU mode fallback
+    ocr_reader = easyocr.Reader(['en'], gpu=ocr_use_gpu())
 except ImportError:
     ocr_reader = None
     print("EasyOCR not found. Using mock OCR.")
 
+# EasyOCR isn't documented as thread-safe: concurrent uploads queue for the reader
+_ocr_semaphore = asyncio.Semaphore(1)
+
 
 async def upload_document(
     file_content: bytes,
@@ -52,8 +57,8 @@ async def upload_document(
     # Step 1: OCR
     raw_text = await perform_ocr(file_content, filename)
     
-    # Step 2: Auto-Classification
-    detected_type, type_confidence = classifier.classify(raw_text)
+    # Step 2: Auto-Classification (memoized per text digest; misses encode off the event loop)
+    detected_type, type_confidence = await asyncio.to_thread(classifier.classify, raw_text)
     
     # If user selected "auto", use detected type
     final_doc_type = detected_type if doc_type == "auto" else doc_type
@@ -117,20 +122,15 @@ async def perform_ocr(file_content: bytes, filename: str) -> str:
         return file_content.decode('utf-8', errors='ignore')
         
     try:
-        # EasyOCR
+        # CPU worker processes, when configured: uploads OCR in parallel
+        pool = get_ocr_pool()
+        if pool is not None:
+            return "\n".join(await read_lines_in_pool(pool, file_content))
+        
+        # EasyOCR (decode + inference run in a worker thread, off the event loop)
         if ocr_reader:
-            # EasyOCR expects bytes or path
-            # reader.readtext(image, detail=0) returns list of strings
-            import numpy as np
-            from PIL import Image
-            import io
-            
-            image = Image.open(io.BytesIO(file_content)).convert('RGB')
-            # Convert to numpy array for EasyOCR
-            image_np = np.array(image)
-            
-            result = ocr_reader.readtext(image_np, detail=0)
-            return "\n".join(result)
+            async with _ocr_semaphore:
+                return await asyncio.to_thread(_ocr_image, file_content)
             
         # Mock Fallback
         return f"[Mock OCR] Content of {filename}.\n Invoice #12345. Total: $500. Date: 2023-10-01."
@@ -140,6 +140,13 @@ async def perform_ocr(file_content: bytes, filename: str) -> str:
         return ""
 
 
+def _ocr_image(file_content: bytes) -> str:
+    """Blocking EasyOCR pass over an image file"""
+    # reader.readtext(image, detail=0) returns list of strings
+    result = ocr_reader.readtext(load_ocr_image(file_content), detail=0)
+    return "\n".join(result)
+
+
 async def extract_fields(raw_text: str, doc_type: str) -> Tuple[List[Dict], float]:
     """Extract structured fields based on doc_type (Regex + LayoutLM placeholder)"""
     fields = []
@@ -147,45 +154,109 @@ async def extract_fields(raw_text: str, doc_type: str) -> Tuple[List[Dict], floa
     
     patterns = get_field_patterns(doc_type)
     
-    for field_name, pattern in patterns.items():
-        matches = re.findall(pattern, raw_text, re.IGNORECASE)
-        if matches:
-            val = matches[0] if isinstance(matches[0], str) else matches[0][0]
-            fields.append({
-                "name": field_name,
-                "value": val,
-                "confidence": 0.9,
-                "type": "extracted"
-            })
-            confidence_scores.append(0.9)
+    for field_name, val in _scan_fields(raw_text, doc_type, patterns).items():
+        fields.append({
+            "name": field_name,
+            "value": val,
+            "confidence": 0.9,
+            "type": "extracted"
+        })
+        confidence_scores.append(0.9)
             
     return fields, (sum(confidence_scores)/len(confidence_scores) if fields else 0.5)
 
 
-def get_field_patterns(doc_type: str) -> Dict[str, str]:
-    """Return field extraction patterns based on document type"""
-    patterns = {
-        "policy": {
-            "policy_number": r'Policy\s*(?:No|Number)[:\s]*([A-Z0-9-]+)',
-            "effective_date": r'Effective\s*(?:Date|From)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            "department": r'Department[:\s]*([A-Za-z\s]+)'
-        },
-        "gazette": {
-            "gazette_number": r'Gazette\s*(?:No|Number)[:\s]*([A-Z0-9-]+)',
-            "published_date": r'Published[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        },
-        "application": {
-            "applicant_name": r'Name[:\s]*([A-Za-z\s]+)',
-            "application_id": r'Application\s*(?:ID|No)[:\s]*([A-Z0-9-]+)',
-            "date": r'Date[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        },
-        "receipt": {
-            "receipt_number": r'Receipt\s*(?:No|Number)[:\s]*([A-Z0-9-]+)',
-            "amount": r'(?:Amount|Total)[:\s]*(?:Rs\.?|₹)?\s*([\d,]+(?:\.\d{2})?)',
-            "date": r'Date[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        }
+# Field extraction patterns per document type (compiled once at import)
+FIELD_PATTERNS = {
+    "policy": {
+        "policy_number": r'Policy\s*(?:No|Number)[:\s]*([A-Z0-9-]+)',
+        "effective_date": r'Effective\s*(?:Date|From)[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        "department": r'Department[:\s]*([A-Za-z\s]+)'
+    },
+    "gazette": {
+        "gazette_number": r'Gazette\s*(?:No|Number)[:\s]*([A-Z0-9-]+)',
+        "published_date": r'Published[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+    },
+    "application": {
+        "applicant_name": r'Name[:\s]*([A-Za-z\s]+)',
+        "application_id": r'Application\s*(?:ID|No)[:\s]*([A-Z0-9-]+)',
+        "date": r'Date[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+    },
+    "receipt": {
+        "receipt_number": r'Receipt\s*(?:No|Number)[:\s]*([A-Z0-9-]+)',
+        "amount": r'(?:Amount|Total)[:\s]*(?:Rs\.?|₹)?\s*([\d,]+(?:\.\d{2})?)',
+        "date": r'Date[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
     }
-    return patterns.get(doc_type, patterns["application"])
+}
+_COMPILED_FIELD_PATTERNS = {
+    doc_type: {name: compile_pattern(pattern, re.IGNORECASE) for name, pattern in fields.items()}
+    for doc_type, fields in FIELD_PATTERNS.items()
+}
+# Per doc type, all fields as one named-group alternation (m.lastgroup names the field)
+_COMBINED_FIELD_PATTERNS = {
+    doc_type: compile_pattern("|".join(f"(?P<{name}>{pattern})" for name, pattern in fields.items()), re.IGNORECASE)
+    for doc_type, fields in FIELD_PATTERNS.items()
+}
+
+# PII patterns (Indian IDs + contact details), compiled once at import
+_PII_SOURCES = {
+    "email": r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}',
+    "phone": r'(?<!\d)(?:\+91[\s-]?)?[6-9]\d{9}(?!\d)',
+    "aadhaar": r'(?<!\d)\d{4}\s?\d{4}\s?\d{4}(?!\d)',
+    "pan": r'\b[A-Z]{5}\d{4}[A-Z]\b'
+}
+PII_PATTERNS = {name: compile_pattern(pattern) for name, pattern in _PII_SOURCES.items()}
+# All PII types as one alternation; m.lastgroup names the type, so the text is scanned once.
+# The digit-boundary lookarounds keep this on re (RE2 has no lookaround); every piece is linear
+PII_UNION = compile_pattern("|".join(f"(?P<{name}>{pattern})" for name, pattern in _PII_SOURCES.items()))
+
+
+def _scan_fields(raw_text: str, doc_type: str, patterns: Dict[str, re.Pattern]) -> Dict[str, str]:
+    """
+    First occurrence of each field, as patterns[name].search(raw_text) would find it,
+    from one scan of the combined alternation.
+    The scan skips over text consumed by another field's match, so a field occurring
+    inside such a match (e.g. "Date:" within a greedy "Name:" value) is re-checked
+    with anchored matches at each position of the earlier spans.
+    """
+    combined = _COMBINED_FIELD_PATTERNS.get(doc_type, _COMBINED_FIELD_PATTERNS["application"])
+    
+    first = {}  # field -> (start, value) of its first match in the scan
+    spans = []  # (start, end, field) of every scanned match, in text order
+    for m in combined.finditer(raw_text):
+        field_name = m.lastgroup
+        spans.append((m.start(), m.end(), field_name))
+        if field_name not in first:
+            # Each field pattern has one capture group, right after its named wrapper
+            first[field_name] = (m.start(), m.group(combined.groupindex[field_name] + 1))
+            if len(first) == len(patterns):
+                break
+    
+    values = {}
+    for field_name, pattern in patterns.items():
+        limit = first[field_name][0] if field_name in first else len(raw_text) + 1
+        val = first[field_name][1] if field_name in first else None
+        # Outside other fields' spans the scan already tried this field at every position
+        for start, end, other in spans:
+            if start >= limit:
+                break
+            if other == field_name:
+                continue
+            m = next(
+                (hit for hit in (pattern.match(raw_text, pos) for pos in range(start, max(end, start + 1))) if hit),
+                None
+            )
+            if m is not None:
+                val = m.group(1)
+                break
+        if val is not None:
+            values[field_name] = val
+    return values
+
+
+def get_field_patterns(doc_type: str) -> Dict[str, re.Pattern]:
+    """Return compiled field extraction patterns based on document type"""
+    return _COMPILED_FIELD_PATTERNS.get(doc_type, _COMPILED_FIELD_PATTERNS["application"])
 
 
 async def detect_pii(text: str) -> Tuple[bool, Dict[str, List]]:
@@ -194,66 +265,101 @@ async def detect_pii(text: str) -> Tuple[bool, Dict[str, List]]:
         return False, {}
     
     pii_locations = {}
-    pii_found = False
     
-    for pii_type, pattern in PII_PATTERNS.items():
-        matches = list(re.finditer(pattern, text))
-        if matches:
-            pii_found = True
-            pii_locations[pii_type] = [(m.start(), m.end(), m.group()) for m in matches]
+    for m in PII_UNION.finditer(text):
+        pii_locations.setdefault(m.lastgroup, []).append((m.start(), m.end(), m.group()))
     
-    return pii_found, pii_locations
+    return bool(pii_locations), pii_locations
 
 
 async def redact_pii(text: str, pii_locations: Dict[str, List]) -> str:
     """Redact PII from text"""
-    redacted = text
-    
-    # Sort all matches by position (reverse to preserve indices)
+    # Sort all matches by position and stitch the text together left to right
     all_matches = []
     for pii_type, locations in pii_locations.items():
         for start, end, value in locations:
             all_matches.append((start, end, pii_type))
     
-    all_matches.sort(key=lambda x: x[0], reverse=True)
+    all_matches.sort(key=lambda x: x[0])
     
+    parts = []
+    cursor = 0
     for start, end, pii_type in all_matches:
-        redacted = redacted[:start] + f"[REDACTED_{pii_type.upper()}]" + redacted[end:]
+        if start < cursor:
+            continue  # overlaps a span that is already redacted
+        parts.append(text[cursor:start])
+        parts.append(f"[REDACTED_{pii_type.upper()}]")
+        cursor = end
+    parts.append(text[cursor:])
     
-    return redacted
+    return "".join(parts)
 
 
 async def generate_embeddings(doc_id: UUID, text: str) -> UUID:
     """Generate and store embeddings for document text"""
     # Chunk text for embedding
-    chunks = chunk_text(text, max_length=512)
+    chunks = chunk_text(text)
     
-    vector_ids = []
-    for i, chunk in enumerate(chunks):
-        vector_id = uuid4()
-        
-        # Generate embedding
-        embedding = embedding_model.encode(chunk).tolist()
-        
-        # Store in vectors table
-        vector_record = {
+    # One batched forward pass for all chunks (encode() length-sorts internally);
+    # unit-length vectors let match_documents rank by inner product
+    embeddings = await asyncio.to_thread(
+        embedding_model.encode, chunks, batch_size=32, convert_to_numpy=True,
+        normalize_embeddings=True, show_progress_bar=False
+    )
+    
+    vector_ids = [uuid4() for _ in chunks]
+    created_at = datetime.utcnow().isoformat()
+    vector_records = [
+        {
             "id": str(vector_id),
-            "embedding": embedding,
+            "embedding": chunk_embedding.tolist(),
             "source_ref": str(doc_id),
             "source_type": "document",
             "doc_id": str(doc_id),
             "page": i + 1,
             "chunk_text": chunk,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": created_at
         }
-        supabase.table("vectors").insert(vector_record).execute()
-        vector_ids.append(vector_id)
+        for i, (vector_id, chunk, chunk_embedding) in enumerate(zip(vector_ids, chunks, embeddings))
+    ]
+    
+    # Store all chunks in one round-trip
+    if vector_records:
+        supabase.table("vectors").insert(vector_records).execute()
     
     return vector_ids[0] if vector_ids else uuid4()
 
 
-def chunk_text(text: str, max_length: int = 512) -> List[str]:
-    """Split text into chunks for embedding"""
+def chunk_text(text: str, max_tokens: int = 256, overlap: int = 32) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens model tokens, overlapping by `overlap`.
+    Chunks are sliced from the original text via the tokenizer's character offsets,
+    so nothing is silently truncated by the encoder and the stored text is unchanged.
+    """
+    tokenizer = getattr(embedding_model, "tokenizer", None)
+    if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+        # Slow tokenizers have no offset mapping
+        return _chunk_words(text)
+    
+    offsets = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )["offset_mapping"]
+    if not offsets:
+        return [text]
+    
+    chunks = []
+    step = max_tokens - overlap
+    for start in range(0, len(offsets), step):
+        window = offsets[start:start + max_tokens]
+        chunks.append(text[window[0][0]:window[-1][1]])
+        if start + max_tokens >= len(offsets):
+            break
+    
+    return chunks
+
+
+def _chunk_words(text: str, max_length: int = 512) -> List[str]:
+    """Split text into chunks of at most max_length characters on word boundaries"""
     words = text.split()
     chunks = []
     current_chunk = []
@@ -282,11 +388,13 @@ async def get_document(doc_id: UUID) -> Optional[Dict]:
 
 async def search_documents(query: str, limit: int = 5) -> List[Dict]:
     """Search documents using embedding similarity"""
-    # Generate query embedding
-    query_embedding = embedding_model.encode(query).tolist()
+    # Generate query embedding ("Policy 123" and "policy 123" share a cache slot)
+    normalized_query = " ".join(query.lower().split())
+    # Repeated portal queries skip the forward pass; concurrent ones share a batch
+    query_embedding = (await get_query_encoder().encode(normalized_query)).tolist()
     
     # Perform vector similarity search (using Supabase RPC)
-    # Note: Requires a Supabase function for vector search
+    # Inner-product search over normalized vectors: setup/migrations/006_vectors_inner_product.sql
     results = supabase.rpc(
         'match_documents',
         {'query_embedding': query_embedding, 'match_threshold': 0.7, 'match_count': limit}
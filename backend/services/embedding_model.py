@@ -0,0 +1,134 @@
+"""
+Shared Embedding Models
+One SentenceTransformer per model name for the whole process, so the RAG chatbot,
+document intelligence, the document classifier and the resume matcher share weights
+instead of each loading (and optimizing) their own copy.
+With ONNX_EMBEDDINGS=true on CPU, EMBEDDING_MODEL is served from the int8 ONNX
+export (setup/export_onnx_encoder.py) instead, when it has been produced.
+
+Single search/chat queries go through a QueryEncoder: an LRU of recent queries
+in front of a micro-batcher that folds concurrent misses into one encode() call.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config import (
+    EMBEDDING_MODEL, ONNX_EMBEDDINGS, CLASSIFIER_ONNX_DIR,
+    QUERY_EMBEDDING_CACHE_SIZE, EMBED_BATCH_MAX, EMBED_BATCH_WAIT_SECONDS
+)
+from services.device import detect_device, optimize_for_device
+from services.onnx_encoder import load_onnx_encoder
+
+_models: Dict[str, SentenceTransformer] = {}
+_models_lock = threading.Lock()
+
+
+def get_embedding_model(name: str = EMBEDDING_MODEL) -> SentenceTransformer:
+    """Get the process-wide model for `name`, loaded on the best device on first use"""
+    model = _models.get(name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                model = _load_model(name)
+                _models[name] = model
+    return model
+
+
+def _load_model(name: str):
+    if ONNX_EMBEDDINGS and name == EMBEDDING_MODEL and detect_device() == "cpu":
+        encoder = load_onnx_encoder(CLASSIFIER_ONNX_DIR)
+        if encoder is not None:
+            print("Embedding model: using int8 ONNX encoder")
+            return encoder
+    return optimize_for_device(SentenceTransformer(name, device=detect_device()))
+
+
+class QueryEncoder:
+    """
+    Unit-length query embeddings for the async services.
+    Repeated queries are answered from an LRU; misses are queued, and one worker
+    task encodes whatever has queued up (up to EMBED_BATCH_MAX, waiting at most
+    EMBED_BATCH_WAIT_SECONDS for more) in a single batched call off the event loop.
+    """
+    
+    def __init__(self, model, cache_size: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self._model = model
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def encode(self, text: str) -> np.ndarray:
+        """Embedding of text (normalize_embeddings=True); treat the result as read-only"""
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        embedding = await future
+        
+        self._cache[text] = embedding
+        self._cache.move_to_end(text)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return embedding
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + EMBED_BATCH_WAIT_SECONDS
+            while len(batch) < EMBED_BATCH_MAX:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Identical queries in one batch are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                embeddings = await asyncio.to_thread(
+                    self._model.encode, texts, batch_size=EMBED_BATCH_MAX, normalize_embeddings=True
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            by_text = dict(zip(texts, embeddings))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+
+
+_query_encoder: Optional[QueryEncoder] = None
+
+
+def get_query_encoder() -> QueryEncoder:
+    """Get the process-wide query encoder for EMBEDDING_MODEL"""
+    global _query_encoder
+    if _query_encoder is None:
+        _query_encoder = QueryEncoder(get_embedding_model())
+    return _query_encoder
@@ -4,20 +4,52 @@ Extracts key information from receipt images using EasyOCR and regex.
 
 Fields: Merchant, Date, Total, Address, Items
 """
+import asyncio
 import re
-import numpy as np
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
-from PIL import Image
-import io
+
+from services.device import ocr_use_gpu
+from services.ocr_pool import get_ocr_pool, load_ocr_image, read_lines_in_pool
+from services.fast_regex import compile_pattern
 
 # Try loading EasyOCR (GPU or CPU)
 try:
     import easyocr
-    reader = easyocr.Reader(['en'], gpu=False) # CPU mode
+    reader = easyocr.Reader(['en'], gpu=ocr_use_gpu())
 except ImportError:
     reader = None
 
+# Field patterns (compiled once at import; RE2 when available, OCR text is untrusted)
+DIGIT_PATTERN = compile_pattern(r'\d')
+
+# DD/MM/YYYY, YYYY-MM-DD, DD-MM-YYYY, DD.MM.YYYY
+_DATE_SOURCES = [
+    r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})',
+    r'(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4})'
+]
+DATE_PATTERNS = [compile_pattern(p, re.IGNORECASE) for p in _DATE_SOURCES]
+
+# "Total", "Amount", "Balance Due", or an amount with a currency marker
+_TOTAL_SOURCES = [
+    r'(?:Total|Amount|Balance|Due)[^0-9]*([\d,]+\.\d{2})',
+    r'(?:RM|Rs\.?|USD|EUR)\s*([\d,]+\.\d{2})'
+]
+TOTAL_PATTERNS = [compile_pattern(p, re.IGNORECASE) for p in _TOTAL_SOURCES]
+
+# Line item: line ending in a price like 12.99
+PRICE_PATTERN = compile_pattern(r'(\d+\.\d{2})$')
+
+# Dates and totals as one named-group alternation (date0.., total0..), so raw_text is scanned once
+RECEIPT_SCAN = compile_pattern(
+    "|".join(
+        [f"(?P<date{i}>{p})" for i, p in enumerate(_DATE_SOURCES)]
+        + [f"(?P<total{i}>{p})" for i, p in enumerate(_TOTAL_SOURCES)]
+    ),
+    re.IGNORECASE
+)
+
 def extract_receipt_info(image_bytes: bytes) -> Dict[str, Any]:
     """
     Extract structured data from receipt image.
@@ -27,51 +59,87 @@ def extract_receipt_info(image_bytes: bytes) -> Dict[str, Any]:
         return {"error": "OCR engine not available"}
         
     try:
-        # Load image
-        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
-        image_np = np.array(image)
-        
         # Perform OCR
         # detail=0 returns text list
-        result = reader.readtext(image_np, detail=0)
-        raw_text = "\n".join(result)
-        
-        # Extract fields using regex/heuristics
-        merchant = _extract_merchant(result)
-        date_str = _extract_date(raw_text)
-        total = _extract_total(raw_text)
-        address = _extract_address(raw_text)
-        
-        return {
-            "merchant": merchant,
-            "date": date_str,
-            "total": total,
-            "address": address,
-            "raw_text": raw_text,
-            "items": _extract_items(result)
-        }
+        result = reader.readtext(load_ocr_image(image_bytes), detail=0)
+        return _parse_receipt_lines(result)
+    except Exception as e:
+        print(f"OCR Extraction Failed: {e}")
+        return {"error": str(e), "raw_text": ""}
+
+async def extract_receipt_info_async(image_bytes: bytes) -> Dict[str, Any]:
+    """
+    extract_receipt_info without blocking the event loop: OCR runs in the
+    worker-process pool when configured, otherwise in a thread.
+    """
+    pool = get_ocr_pool()
+    if pool is None:
+        return await asyncio.to_thread(extract_receipt_info, image_bytes)
+    
+    try:
+        result = await read_lines_in_pool(pool, image_bytes)
+        return _parse_receipt_lines(result)
     except Exception as e:
         print(f"OCR Extraction Failed: {e}")
         return {"error": str(e), "raw_text": ""}
 
+def _parse_receipt_lines(result: List[str]) -> Dict[str, Any]:
+    """Extract fields from OCR lines using regex/heuristics"""
+    raw_text = "\n".join(result)
+    
+    merchant = _extract_merchant(result)
+    date_str, total = _scan_date_and_total(raw_text)
+    address = _extract_address(raw_text)
+    
+    return {
+        "merchant": merchant,
+        "date": date_str,
+        "total": total,
+        "address": address,
+        "raw_text": raw_text,
+        "items": _extract_items(result)
+    }
+
 def _extract_merchant(lines: List[str]) -> str:
     """Extract merchant name (usually first line with substantial text)"""
     for line in lines[:3]: # check top 3 lines
-        if len(line.strip()) > 3 and not re.search(r'\d', line):
+        if len(line.strip()) > 3 and not DIGIT_PATTERN.search(line):
             return line.strip()
     return "Unknown Merchant"
 
+def _scan_date_and_total(text: str) -> Tuple[Optional[str], float]:
+    """Single-pass equivalent of _extract_date + _extract_total"""
+    first_date = None  # (DATE_PATTERNS index, value) of the earliest date match
+    amounts = []
+    
+    for m in RECEIPT_SCAN.finditer(text):
+        kind = m.lastgroup
+        # Each pattern has one capture group, right after its named wrapper
+        value = m.group(RECEIPT_SCAN.groupindex[kind] + 1)
+        if kind.startswith("date"):
+            if first_date is None:
+                first_date = (int(kind[4:]), value)
+        else:
+            try:
+                amounts.append(float(value.replace(',', '')))
+            except ValueError:
+                pass
+    
+    if first_date is None:
+        date_str = None
+    elif first_date[0] == 0:
+        date_str = first_date[1]
+    else:
+        # Formats are tried in priority order; a preferred one may be later or inside this match
+        date_str = _extract_date(text)
+    
+    # Usually total is the largest amount
+    return date_str, (max(amounts) if amounts else 0.0)
+
 def _extract_date(text: str) -> Optional[str]:
     """Extract date from text"""
-    # DD/MM/YYYY, YYYY-MM-DD, DD-MM-YYYY, DD.MM.YYYY
-    date_patterns = [
-        r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-        r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})',
-        r'(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4})'
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             return match.group(1)
     return None
@@ -81,15 +149,10 @@ def _extract_total(text: str) -> Optional[float]:
     # Look for "Total", "Amount", "Balance Due"
     # Or just largest number with currency symbol
     
-    total_patterns = [
-        r'(?:Total|Amount|Balance|Due)[^0-9]*([\d,]+\.\d{2})',
-        r'(?:RM|Rs\.?|USD|EUR)\s*([\d,]+\.\d{2})'
-    ]
-    
     amounts = []
     
-    for pattern in total_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in TOTAL_PATTERNS:
+        matches = pattern.findall(text)
         for m in matches:
             try:
                 amounts.append(float(m.replace(',', '')))
@@ -111,10 +174,8 @@ def _extract_items(lines: List[str]) -> List[Dict]:
     """Extract line items (products + price)"""
     items = []
     # Heuristic: Line ending in a price like 12.99
-    price_pattern = r'(\d+\.\d{2})$'
-    
     for line in lines:
-        match = re.search(price_pattern, line.strip())
+        match = PRICE_PATTERN.search(line.strip())
         if match:
             price_str = match.group(1)
             item_name = line[:match.start()].strip()
@@ -9,14 +9,15 @@ from uuid import UUID, uuid4
 from datetime import datetime, date
 from collections import defaultdict
 
-from supabase import create_client
+import numpy as np
 
-from config import SUPABASE_URL, SUPABASE_KEY
-from services.expense_ocr import extract_receipt_info
+from services.supabase_client import get_supabase
+from services.expense_ocr import extract_receipt_info_async
 from services.audit_service import log_ai_decision
+from services.write_queue import get_write_queue
 
 # Initialize Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = get_supabase()
 
 # Expense categories
 EXPENSE_CATEGORIES = {
@@ -29,12 +30,19 @@ EXPENSE_CATEGORIES = {
     "food": ["restaurant", "cafe", "coffee", "bistro", "food", "kitchen"]
 }
 
+# (keyword, category) longest first; the sort is stable so equal lengths keep category order
+_KEYWORDS_BY_LENGTH = sorted(
+    ((keyword, category) for category, keywords in EXPENSE_CATEGORIES.items() for keyword in keywords),
+    key=lambda pair: len(pair[0]),
+    reverse=True
+)
+
 async def process_receipt(image_bytes: bytes) -> Dict[str, Any]:
     """
     Process receipt image -> OCR -> categorize -> ingest.
     """
     # 1. OCR Extraction
-    info = extract_receipt_info(image_bytes)
+    info = await extract_receipt_info_async(image_bytes)
     
     if "error" in info:
         return {"error": info["error"], "success": False}
@@ -79,7 +87,7 @@ async def process_receipt(image_bytes: bytes) -> Dict[str, Any]:
         "anomaly_score": anomaly_score,
         "is_anomaly": is_anomaly,
         "raw_text": raw_text[:2000],
-        "decision_id": str(decision_id),
+        "decision_id": str(decision_id) if decision_id else None,
         "created_at": datetime.utcnow().isoformat()
     }
     
@@ -126,11 +134,11 @@ async def ingest_expense(
         "confidence": confidence,
         "anomaly_score": anomaly_score,
         "is_anomaly": is_anomaly,
-        "decision_id": str(decision_id),
+        "decision_id": str(decision_id) if decision_id else None,
         "created_at": (timestamp or datetime.utcnow()).isoformat()
     }
     
-    supabase.table("expenses").insert(expense_record).execute()
+    await get_write_queue().enqueue("expenses", expense_record)
     
     return expense_record
 
@@ -146,14 +154,13 @@ async def categorize_expense(description: str) -> tuple[str, Optional[str], floa
     best_subcategory = None
     best_score = 0
     
-    for category, keywords in EXPENSE_CATEGORIES.items():
-        for keyword in keywords:
-            if keyword in description_lower:
-                score = len(keyword) / len(description)
-                if score > best_score:
-                    best_score = score
-                    best_category = category
-                    best_subcategory = keyword
+    # Score is len(keyword) / len(description), so the first (longest) hit is the best one
+    for keyword, category in _KEYWORDS_BY_LENGTH:
+        if keyword in description_lower:
+            best_score = len(keyword) / len(description)
+            best_category = category
+            best_subcategory = keyword
+            break
     
     confidence = min(0.6 + best_score * 2, 0.95)
     return best_category, best_subcategory, confidence
@@ -177,11 +184,10 @@ async def detect_anomaly(
         # Not enough history
         return 0.0, False
     
-    # Calculate statistics
-    amounts = [e["amount"] for e in history.data]
-    mean_amount = sum(amounts) / len(amounts)
-    variance = sum((a - mean_amount) ** 2 for a in amounts) / len(amounts)
-    std_dev = variance ** 0.5 if variance > 0 else 1
+    # Calculate statistics (population std, as before)
+    amounts = np.fromiter((e["amount"] for e in history.data), dtype=np.float64, count=len(history.data))
+    mean_amount = float(amounts.mean())
+    std_dev = float(amounts.std()) or 1.0
     
     # Calculate z-score
     z_score = abs(amount - mean_amount) / max(std_dev, 1)
@@ -210,7 +216,7 @@ async def generate_monthly_summary(
         end_date = date(year, month + 1, 1)
     
     # Get expenses for the period
-    expenses = supabase.table("expenses").select("*").eq(
+    expenses = supabase.table("expenses").select("category, amount, is_anomaly").eq(
         "department", department
     ).gte("created_at", start_date.isoformat()).lt(
         "created_at", end_date.isoformat()
@@ -225,18 +231,17 @@ async def generate_monthly_summary(
             "anomaly_count": 0
         }
     
-    # Aggregate by category
-    by_category = defaultdict(float)
-    total_amount = 0
-    anomaly_count = 0
+    # Aggregate by category: pull the columns into arrays once, then group with bincount
+    categories = [expense.get("category") or "other" for expense in expenses.data]
+    amounts = np.fromiter(
+        (expense.get("amount") or 0 for expense in expenses.data), dtype=np.float64, count=len(expenses.data)
+    )
+    anomaly_count = sum(1 for expense in expenses.data if expense.get("is_anomaly"))
     
-    for expense in expenses.data:
-        category = expense.get("category", "other")
-        amount = expense.get("amount", 0)
-        by_category[category] += amount
-        total_amount += amount
-        if expense.get("is_anomaly"):
-            anomaly_count += 1
+    category_names, category_index = np.unique(categories, return_inverse=True)
+    category_totals = np.bincount(category_index, weights=amounts, minlength=len(category_names))
+    by_category = {str(name): float(total) for name, total in zip(category_names, category_totals)}
+    total_amount = float(amounts.sum())
     
     # Create summary record
     summary_id = uuid4()
@@ -246,7 +251,7 @@ async def generate_monthly_summary(
         "period_start": start_date.isoformat(),
         "period_end": end_date.isoformat(),
         "total_amount": total_amount,
-        "by_category": dict(by_category),
+        "by_category": by_category,
         "anomaly_count": anomaly_count,
         "created_at": datetime.utcnow().isoformat()
     }
@@ -257,7 +262,7 @@ async def generate_monthly_summary(
         "department": department,
         "period": f"{year}-{month:02d}",
         "total_amount": total_amount,
-        "by_category": dict(by_category),
+        "by_category": by_category,
         "anomaly_count": anomaly_count,
         "expense_count": len(expenses.data)
     }
@@ -272,18 +277,15 @@ async def get_citizen_transparency_view(
     """
     year = year or date.today().year
     
-    query = supabase.table("expense_summaries").select("*")
-    
-    if department:
-        query = query.eq("department", department)
-    
-    # Get current year summaries
-    start_of_year = date(year, 1, 1).isoformat()
-    query = query.gte("period_start", start_of_year)
-    
-    summaries = query.execute()
+    # Aggregated in Postgres (setup/migrations/005_citizen_yearly.sql): one row back, not every summary
+    try:
+        result = supabase.rpc("citizen_yearly", {"p_year": year, "p_department": department}).execute()
+        totals = result.data[0] if result.data else None
+    except Exception as e:
+        print(f"Yearly transparency RPC unavailable, aggregating in Python: {e}")
+        totals = _aggregate_yearly(department, year)
     
-    if not summaries.data:
+    if not totals or not totals["summary_count"]:
         return {
             "year": year,
             "total_spending": 0,
@@ -291,12 +293,31 @@ async def get_citizen_transparency_view(
             "by_category": {}
         }
     
-    # Aggregate
+    return {
+        "year": year,
+        "total_spending": totals["total_spending"],
+        "by_department": totals["by_department"],
+        "by_category": totals["by_category"],
+        "summary_count": totals["summary_count"]
+    }
+
+
+def _aggregate_yearly(department: Optional[str], year: int) -> Dict[str, Any]:
+    """Python fallback for the citizen_yearly RPC"""
+    query = supabase.table("expense_summaries").select("department, total_amount, by_category")
+    
+    if department:
+        query = query.eq("department", department)
+    
+    # Get current year summaries
+    start_of_year = date(year, 1, 1).isoformat()
+    summaries = query.gte("period_start", start_of_year).execute()
+    
     by_department = defaultdict(float)
     by_category = defaultdict(float)
     total_spending = 0
     
-    for summary in summaries.data:
+    for summary in summaries.data or []:
         dept = summary.get("department", "other")
         by_department[dept] += summary.get("total_amount", 0)
         total_spending += summary.get("total_amount", 0)
@@ -305,11 +326,10 @@ async def get_citizen_transparency_view(
             by_category[cat] += amount
     
     return {
-        "year": year,
         "total_spending": total_spending,
         "by_department": dict(by_department),
         "by_category": dict(by_category),
-        "summary_count": len(summaries.data)
+        "summary_count": len(summaries.data or [])
     }
 
 
@@ -0,0 +1,105 @@
+"""
+Linear-time Regex Compilation
+Compiles patterns that scan untrusted text (OCR output, scraped articles) with google-re2
+when it is installed. RE2 matches in linear time, so adversarial input can't trigger
+catastrophic backtracking. Patterns RE2 rejects (lookarounds, backreferences)
+and installs without google-re2 fall back to the standard re module.
+"""
+import re
+from typing import Dict, List, Optional
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Characters that make a pattern more than a plain literal
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+# re flags RE2 understands, expressed as inline modifiers
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+
+def compile_pattern(pattern: str, flags: int = 0):
+    """Compile with RE2 when possible, otherwise with re"""
+    if re2 is not None:
+        inline = "".join(letter for flag, letter in _INLINE_FLAGS if flags & flag)
+        try:
+            return re2.compile(f"(?{inline}){pattern}" if inline else pattern)
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+
+class PatternSet:
+    """
+    Which of several patterns occur in a text.
+    Plain-literal patterns (no metacharacters) are answered with substring
+    checks against the (lowercased) text. The real regexes go through an
+    RE2 Set (one automaton, one linear pass) when google-re2 is installed,
+    otherwise one scan of a named-group alternation, and are skipped
+    entirely when their required literal (from `literals`) is absent.
+    """
+    
+    def __init__(self, patterns: List[str], ignore_case: bool = False, literals: Optional[Dict[str, str]] = None):
+        self._ignore_case = ignore_case
+        literals = literals or {}
+        self._plain = []  # (pattern index, literal)
+        self._regex_index = []  # regex bucket position -> pattern index
+        regex_patterns = []
+        required = []
+        for i, p in enumerate(patterns):
+            if not _REGEX_META.intersection(p):
+                self._plain.append((i, self._fold(p)))
+                continue
+            self._regex_index.append(i)
+            regex_patterns.append(p)
+            literal = literals.get(p)
+            # Without a known literal the prefilter can't rule the regexes out
+            required = None if literal is None or required is None else required + [self._fold(literal)]
+        self._required = required
+        
+        self._set = None
+        self._union = None
+        if not regex_patterns:
+            return
+        if re2 is not None:
+            try:
+                options = re2.Options()
+                options.case_sensitive = not ignore_case
+                pattern_set = re2.Set.SearchSet(options)
+                for pattern in regex_patterns:
+                    pattern_set.Add(pattern)
+                pattern_set.Compile()
+                self._set = pattern_set
+            except Exception:
+                self._set = None
+        if self._set is None:
+            self._union = re.compile(
+                "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(regex_patterns)),
+                re.IGNORECASE if ignore_case else 0
+            )
+    
+    def _fold(self, s: str) -> str:
+        return s.lower() if self._ignore_case else s
+    
+    def matches(self, text: str) -> List[int]:
+        """Indices of the patterns with at least one hit, ascending"""
+        folded = self._fold(text)
+        hits = [i for i, literal in self._plain if literal in folded]
+        
+        if not self._regex_index:
+            return hits
+        if self._required is not None and not any(literal in folded for literal in self._required):
+            return hits
+        
+        if self._set is not None:
+            hits.extend(self._regex_index[j] for j in self._set.Match(text))
+        else:
+            found = set()
+            for m in self._union.finditer(text):
+                found.add(int(m.lastgroup[1:]))
+                if len(found) == len(self._regex_index):
+                    break
+            hits.extend(self._regex_index[j] for j in found)
+        return sorted(hits)
@@ -0,0 +1,53 @@
+"""
+Background Job Store
+Status records for work that finishes after the request returns (news analysis),
+readable from any worker: a Redis key per job with a TTL, or an in-process dict
+when Redis isn't configured.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+import orjson
+
+from services.redis_client import get_redis
+
+
+class JobStore:
+    """job_id -> JSON-serializable record, expiring ttl_seconds after it was created"""
+
+    def __init__(self, namespace: str, ttl_seconds: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._local: Dict[str, tuple] = {}  # job_id -> (expires_at, record) without Redis
+        self._lock = threading.Lock()
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.namespace}:{job_id}"
+
+    def put(self, job_id: str, record: Dict) -> None:
+        """Create or replace a job record (the TTL restarts from now)"""
+        client = get_redis()
+        if client is not None:
+            body = orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS, default=str)
+            client.set(self._key(job_id), body, ex=self.ttl_seconds)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for expired in [j for j, (expires_at, _) in self._local.items() if expires_at < now]:
+                del self._local[expired]
+            self._local[job_id] = (now + self.ttl_seconds, record)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job record, or None if unknown or expired"""
+        client = get_redis()
+        if client is not None:
+            body = client.get(self._key(job_id))
+            return orjson.loads(body) if body else None
+
+        with self._lock:
+            entry = self._local.get(job_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
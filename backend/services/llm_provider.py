@@ -1,13 +1,26 @@
 import logging
 import asyncio
+from typing import AsyncIterator
+import httpx
 import google.generativeai as genai
-from ollama import Client as OllamaClient
-from config import LLM_MODEL, GOOGLE_API_KEY
+from ollama import AsyncClient as OllamaClient
+from config import (
+    LLM_MODEL, GOOGLE_API_KEY, GEMINI_TIMEOUT, OLLAMA_TIMEOUT, OLLAMA_KEEP_ALIVE, LLM_HEDGE_DELAY
+)
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+# Start of the answer returned when no provider responds (callers check for it)
+UNAVAILABLE_PREFIX = "I apologize, but I am currently unable to reach my AI brain."
+
+
+def _unavailable_message(error: Exception) -> str:
+    return f"{UNAVAILABLE_PREFIX} Please ensure either Gemini API is active or Ollama is running locally. (Error: {str(error)})"
+
+
 class LLMProvider:
     """
     Unified LLM Provider - Hybrid Gemini + Ollama.
@@ -19,62 +32,156 @@ class LLMProvider:
         if GOOGLE_API_KEY:
             genai.configure(api_key=GOOGLE_API_KEY)
             self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+            # System instruction -> model carrying it natively (a handful of fixed prompts)
+            self._gemini_models = {}
             self.use_gemini = True
             print("LLM Provider initialized with Google Gemini (Primary)")
         else:
             self.use_gemini = False
             print("WARNING: GOOGLE_API_KEY missing. Falling back to Ollama.")
 
-        # Initialize Ollama
-        self.ollama_client = OllamaClient(host='http://localhost:11434')
+        # Initialize Ollama (one pooled async HTTP client; idle connections are kept for reuse)
+        self.ollama_client = OllamaClient(
+            host='http://localhost:11434',
+            timeout=OLLAMA_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30)
+        )
         self.ollama_model = "llama3.2" 
         
     async def generate(self, prompt: str, system_instruction: str = None) -> str:
         """
         Generate text using Gemini (Primary) or Ollama (Secondary).
         """
+        return "".join([chunk async for chunk in self.stream(prompt, system_instruction)])
+    
+    async def generate_hedged(
+        self, prompt: str, system_instruction: str = None, hedge_delay: float = LLM_HEDGE_DELAY
+    ) -> str:
+        """
+        Hedged generate for interactive paths: Gemini starts first, and if it has
+        not answered within hedge_delay seconds Ollama is started as well. The
+        first successful answer wins and the other request is cancelled.
+        """
+        if not self.use_gemini:
+            return await self.generate(prompt, system_instruction)
+        
+        pending = {asyncio.create_task(self._gemini_text(prompt, system_instruction))}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+                logger.error(f"Gemini failed: {error}. Falling back to Ollama.")
+            
+            logger.info(f"Hedging with Ollama ({self.ollama_model})...")
+            pending.add(asyncio.create_task(self._ollama_text(prompt, system_instruction)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                    logger.error(f"Hedged LLM request failed: {error}")
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        logger.error(f"All LLM providers failed: {error}")
+        return _unavailable_message(error)
+    
+    def _gemini_model_for(self, system_instruction: str):
+        """Gemini model with the system instruction attached, or None if the SDK predates that"""
+        model = self._gemini_models.get(system_instruction)
+        if model is None:
+            try:
+                model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=system_instruction)
+            except TypeError:
+                return None
+            self._gemini_models[system_instruction] = model
+        return model
+    
+    async def _gemini_text(self, prompt: str, system_instruction: str = None) -> str:
+        """One Gemini completion, bounded by GEMINI_TIMEOUT"""
+        def run_gemini():
+            model = self._gemini_model_for(system_instruction) if system_instruction else self.gemini_model
+            if model is None:
+                model = self.gemini_model
+                full_prompt = f"{system_instruction}\n\nUser Question: {prompt}"
+            else:
+                full_prompt = prompt
+            
+            response = model.generate_content(full_prompt)
+            return response.text
+        
+        # Bounded so a Gemini tail-latency spike falls through to Ollama
+        # (the worker thread finishes in the background)
+        return await asyncio.wait_for(asyncio.to_thread(run_gemini), timeout=GEMINI_TIMEOUT)
+    
+    async def _ollama_text(self, prompt: str, system_instruction: str = None) -> str:
+        """One non-streamed Ollama completion"""
+        if system_instruction:
+            messages = [
+                {'role': 'system', 'content': system_instruction},
+                {'role': 'user', 'content': prompt}
+            ]
+            response = await self.ollama_client.chat(
+                model=self.ollama_model, messages=messages, keep_alive=OLLAMA_KEEP_ALIVE
+            )
+            return response['message']['content']
+        response = await self.ollama_client.generate(
+            model=self.ollama_model, prompt=prompt, keep_alive=OLLAMA_KEEP_ALIVE
+        )
+        return response['response']
+    
+    async def stream(self, prompt: str, system_instruction: str = None) -> AsyncIterator[str]:
+        """
+        Stream generated text chunks from Gemini (Primary) or Ollama (Secondary).
+        Gemini yields the full answer as one chunk; Ollama yields tokens as they arrive.
+        """
         # 1. Try Gemini (Primary)
         if self.use_gemini:
             try:
                 logger.info(f"Generating with Gemini (1.5 Flash)...")
-                
-                def run_gemini():
-                    if system_instruction:
-                        full_prompt = f"{system_instruction}\n\nUser Question: {prompt}"
-                    else:
-                        full_prompt = prompt
-                    
-                    response = self.gemini_model.generate_content(full_prompt)
-                    return response.text
-
-                return await asyncio.to_thread(run_gemini)
+                yield await self._gemini_text(prompt, system_instruction)
+                return
+            except asyncio.TimeoutError:
+                logger.error(f"Gemini timed out after {GEMINI_TIMEOUT}s. Falling back to Ollama.")
             except Exception as e:
                 logger.error(f"Gemini failed: {e}. Falling back to Ollama.")
                 print(f"Gemini Error: {e}")
 
         # 2. Try Ollama (Local Fallback)
+        started = False
         try:
             logger.info(f"Generating with Ollama ({self.ollama_model})...")
             
-            def run_ollama():
-                if system_instruction:
-                    messages = [
-                        {'role': 'system', 'content': system_instruction},
-                        {'role': 'user', 'content': prompt}
-                    ]
-                    response = self.ollama_client.chat(model=self.ollama_model, messages=messages)
-                    if hasattr(response, 'message'):
-                        return response.message.content
-                    return response['message']['content']
-                else:
-                    response = self.ollama_client.generate(model=self.ollama_model, prompt=prompt)
-                    return response['response'] if isinstance(response, dict) else response.response
-
-            return await asyncio.to_thread(run_ollama)
+            if system_instruction:
+                messages = [
+                    {'role': 'system', 'content': system_instruction},
+                    {'role': 'user', 'content': prompt}
+                ]
+                response = await self.ollama_client.chat(
+                    model=self.ollama_model, messages=messages, stream=True, keep_alive=OLLAMA_KEEP_ALIVE
+                )
+                async for part in response:
+                    started = True
+                    yield part['message']['content']
+            else:
+                response = await self.ollama_client.generate(
+                    model=self.ollama_model, prompt=prompt, stream=True, keep_alive=OLLAMA_KEEP_ALIVE
+                )
+                async for part in response:
+                    started = True
+                    yield part['response']
                 
         except Exception as e:
             logger.error(f"All LLM providers failed: {e}")
-            return f"I apologize, but I am currently unable to reach my AI brain. Please ensure either Gemini API is active or Ollama is running locally. (Error: {str(e)})"
+            if started:
+                # Partial answer already delivered; the caller keeps what it has
+                return
+            yield _unavailable_message(e)
 
 # Singleton instance
 llm_provider = LLMProvider()
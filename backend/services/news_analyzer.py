@@ -9,19 +9,47 @@ Features:
 4. Evidence-based reasoning
 """
 import asyncio
+import os
 import re
-import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4
 from urllib.parse import urlparse
 
+import orjson
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from config import NEWS_CACHE_SIZE, NEWS_CACHE_TTL_SECONDS, NEWS_MAX_PAGE_BYTES
+from services.fast_regex import PatternSet
 
-@dataclass
+# selectolax (C HTML engine) parses pages much faster than BeautifulSoup; with
+# bs4, prefer the lxml backend over the pure-Python html.parser
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+try:
+    import lxml  # noqa: F401
+    _BS4_PARSER = 'lxml'
+except ImportError:
+    _BS4_PARSER = 'html.parser'
+
+# aiohttp lets article fetches overlap on the event loop; without it the
+# pooled requests session runs in a worker thread
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+@dataclass(slots=True)
 class ArticleAnalysis:
     """Result of news article authenticity analysis"""
     url: str
@@ -62,6 +90,10 @@ class ArticleAnalysis:
             "word_count": self.word_count,
             "analyzed_at": self.analyzed_at
         }
+    
+    def to_json_bytes(self) -> bytes:
+        """to_dict() as UTF-8 JSON, encoded by orjson's C serializer"""
+        return orjson.dumps(self.to_dict(), option=orjson.OPT_NON_STR_KEYS)
 
 
 # Known domain reputations (simplified - in production use a proper database)
@@ -90,6 +122,12 @@ SUSPICIOUS_DOMAINS = {
     "worldnewsdailyreport.com": "satire_often_shared_as_real",
 }
 
+# Registered domain -> reputation label (trusted wins if a domain is in both)
+_DOMAIN_REPUTATION = {
+    **{d: f"suspicious_{reason}" for d, reason in SUSPICIOUS_DOMAINS.items()},
+    **{d: f"trusted_{level}" for d, level in TRUSTED_DOMAINS.items()},
+}
+
 # Clickbait and sensational patterns
 CLICKBAIT_PATTERNS = [
     r"you won't believe",
@@ -117,6 +155,178 @@ CREDIBILITY_INDICATORS = [
     r"fact-check",
 ]
 
+# Each list as one pattern set, so the text is scanned once per list (RE2 Set when installed)
+_CLICKBAIT_SET = PatternSet(CLICKBAIT_PATTERNS, ignore_case=True, literals={r"\d+ reasons why": " reasons why"})
+_CREDIBILITY_SET = PatternSet(CREDIBILITY_INDICATORS, ignore_case=True)
+_WHITESPACE_RE = re.compile(r'\s+')
+# Content stats in one scan: exclamation marks, double quotes, all-caps words, numbers/percentages
+# (the branches can't overlap, so each count matches a standalone search). Quotes cover
+# typographic “ ” and « » too; single curly quotes are left out since ’ doubles as an apostrophe.
+_STATS_RE = re.compile(r'(!)|(["\u201c\u201d\u00ab\u00bb])|\b([A-Z]{4,})\b|(\b\d+(?:\.\d+)?%?\b)')
+
+# Shared HTTP session: keep-alive connections are reused across articles from the same host
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+_ADAPTER = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=Retry(total=2, backoff_factor=0.3))
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+
+# aiohttp session, created on first use and bound to that event loop
+_aio_session = None
+_aio_loop = None
+
+
+def _get_aio_session():
+    global _aio_session, _aio_loop
+    loop = asyncio.get_running_loop()
+    if _aio_session is None or _aio_session.closed or _aio_loop is not loop:
+        _aio_session = aiohttp.ClientSession(
+            headers=dict(_SESSION.headers),
+            connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=300)
+        )
+        _aio_loop = loop
+    return _aio_session
+
+
+def _decode_html(body: bytes, charset: Optional[str]) -> str:
+    """Decode once with the declared charset (UTF-8 when absent or unknown), no charset sniffing"""
+    try:
+        return body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+async def _fetch_html(url: str) -> str:
+    """Fetch a page without blocking the event loop; bodies past NEWS_MAX_PAGE_BYTES are truncated"""
+    if aiohttp is not None:
+        session = _get_aio_session()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10, connect=3)) as response:
+            response.raise_for_status()
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(65536):
+                body += chunk
+                if len(body) >= NEWS_MAX_PAGE_BYTES:
+                    break
+            return _decode_html(bytes(body[:NEWS_MAX_PAGE_BYTES]), response.charset)
+    
+    def fetch():
+        with _SESSION.get(url, timeout=(3, 10), stream=True) as response:
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(65536):
+                body += chunk
+                if len(body) >= NEWS_MAX_PAGE_BYTES:
+                    break
+            # requests guesses ISO-8859-1 for text/* without a charset; only trust a declared one
+            declared = 'charset' in response.headers.get('content-type', '').lower()
+            return _decode_html(bytes(body[:NEWS_MAX_PAGE_BYTES]), response.encoding if declared else None)
+    
+    return await asyncio.to_thread(fetch)
+
+
+def _parse_article(html: str) -> Tuple[str, str]:
+    """Extract (title, paragraph text) from a page: <title> or first <h1>; <article> paragraphs, else all <p>"""
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        
+        # Extract title
+        title_node = tree.css_first('title')
+        title = title_node.text(strip=True) if title_node else ""
+        if not title:
+            h1 = tree.css_first('h1')
+            if h1:
+                title = h1.text(strip=True)
+        
+        # One query for every paragraph; the article subset is picked out of it
+        paragraphs = tree.css('p')
+        texts = [p.text(strip=True) for p in paragraphs]
+        article = tree.css_first('article')
+        article_id = article.mem_id if article else None
+        
+        def in_article(node) -> bool:
+            node = node.parent
+            while node is not None:
+                if node.mem_id == article_id:
+                    return True
+                node = node.parent
+            return False
+        
+        return title, _article_or_all(paragraphs, texts, in_article if article else None)
+    
+    soup = BeautifulSoup(html, _BS4_PARSER)
+    
+    # Extract title
+    title = ""
+    if soup.title:
+        title = soup.title.string or ""
+    if not title:
+        h1 = soup.find('h1')
+        if h1:
+            title = h1.get_text(strip=True)
+    
+    # One find_all for every paragraph; the article subset is picked out of it
+    paragraphs = soup.find_all('p')
+    texts = [p.get_text(strip=True) for p in paragraphs]
+    article = soup.find('article')
+    
+    def in_article(tag) -> bool:
+        return any(parent is article for parent in tag.parents)
+    
+    return title, _article_or_all(paragraphs, texts, in_article if article else None)
+
+
+def _article_or_all(paragraphs: list, texts: List[str], in_article) -> str:
+    """Paragraphs of the first <article>, or every paragraph when that is under 100 chars"""
+    if in_article is not None:
+        content = ' '.join(t for p, t in zip(paragraphs, texts) if in_article(p))
+        if len(content) >= 100:
+            return content
+    return ' '.join(texts)
+
+
+def _parse_and_clean(html: str) -> Tuple[str, str]:
+    """_parse_article plus whitespace cleanup: all the CPU work for one page"""
+    title, content = _parse_article(html)
+    return title, _WHITESPACE_RE.sub(' ', content).strip()
+
+
+# Parsing is CPU-bound; a bounded pool keeps it off the event loop so fetches keep flowing
+_PARSE_POOL = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="news-parse")
+
+
+async def close_http_session():
+    """Close the shared aiohttp session (called at application shutdown)"""
+    global _aio_session
+    if _aio_session is not None and not _aio_session.closed:
+        await _aio_session.close()
+    _aio_session = None
+
+# URL -> (expires_at, ArticleAnalysis); repeat analyses within the TTL skip fetch + parse + scoring
+_analysis_cache: "OrderedDict[str, Tuple[float, ArticleAnalysis]]" = OrderedDict()
+# URL -> analysis in progress, so concurrent requests for one URL share a single fetch
+_inflight: Dict[str, "asyncio.Future[ArticleAnalysis]"] = {}
+
+
+def _cached_analysis(url: str) -> Optional["ArticleAnalysis"]:
+    entry = _analysis_cache.get(url)
+    if entry is None:
+        return None
+    expires_at, analysis = entry
+    if expires_at < time.monotonic():
+        del _analysis_cache[url]
+        return None
+    _analysis_cache.move_to_end(url)
+    return analysis
+
+
+def _store_analysis(url: str, analysis: "ArticleAnalysis"):
+    _analysis_cache[url] = (time.monotonic() + NEWS_CACHE_TTL_SECONDS, analysis)
+    _analysis_cache.move_to_end(url)
+    if len(_analysis_cache) > NEWS_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
+
 
 class NewsArticleAnalyzer:
     """
@@ -132,22 +342,37 @@ class NewsArticleAnalyzer:
     
     def __init__(self, embedding_model=None):
         self.embedding_model = embedding_model
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
     
     async def analyze_url(self, url: str) -> ArticleAnalysis:
         """
         Main analysis function - takes URL and returns authenticity analysis
         """
+        cached = _cached_analysis(url)
+        if cached is not None:
+            return cached
+        
+        task = _inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze_uncached(url))
+            _inflight[url] = task
+            task.add_done_callback(lambda _: _inflight.pop(url, None))
+        result = await asyncio.shield(task)
+        
+        # Failed fetches come back without content; don't pin those for an hour
+        if result.word_count:
+            _store_analysis(url, result)
+        return result
+    
+    async def _analyze_uncached(self, url: str) -> ArticleAnalysis:
         # Step 1: Extract content
         title, content, domain = await self._extract_article(url)
         
         # Step 2: Analyze domain reputation
         domain_rep = self._check_domain_reputation(domain)
         
-        # Step 3: Content analysis
-        risk_factors, trust_signals = self._analyze_content(title, content)
+        # Step 3: Content analysis (words split once, shared with the result)
+        words = content.split()
+        risk_factors, trust_signals = self._analyze_content(title, content, words, domain_rep)
         
         # Step 4: Calculate authenticity score
         score, label, confidence = self._calculate_authenticity(
@@ -162,7 +387,7 @@ class NewsArticleAnalyzer:
         return ArticleAnalysis(
             url=url,
             title=title,
-            content=content[:2000] + "..." if len(content) > 2000 else content,
+            content=(content[:2000] + "...") if len(content) > 2000 else content,
             domain=domain,
             authenticity_score=score,
             credibility_label=label,
@@ -171,7 +396,7 @@ class NewsArticleAnalyzer:
             risk_factors=risk_factors,
             trust_signals=trust_signals,
             domain_reputation=domain_rep,
-            word_count=len(content.split())
+            word_count=len(words)
         )
     
     async def _extract_article(self, url: str) -> Tuple[str, str, str]:
@@ -182,37 +407,12 @@ class NewsArticleAnalyzer:
             domain = parsed.netloc.replace("www.", "")
             
             # Fetch page
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract title
-            title = ""
-            if soup.title:
-                title = soup.title.string or ""
-            if not title:
-                h1 = soup.find('h1')
-                if h1:
-                    title = h1.get_text(strip=True)
-            
-            # Extract main content
-            # Try common article containers
-            content = ""
-            
-            # Try article tag
-            article = soup.find('article')
-            if article:
-                paragraphs = article.find_all('p')
-                content = ' '.join(p.get_text(strip=True) for p in paragraphs)
-            
-            # Fallback: all paragraphs
-            if not content or len(content) < 100:
-                paragraphs = soup.find_all('p')
-                content = ' '.join(p.get_text(strip=True) for p in paragraphs)
+            html = await _fetch_html(url)
             
-            # Clean up
-            content = re.sub(r'\s+', ' ', content).strip()
+            # Parse + clean up in the parse pool
+            title, content = await asyncio.get_running_loop().run_in_executor(
+                _PARSE_POOL, _parse_and_clean, html
+            )
             
             return title, content, domain
             
@@ -221,66 +421,91 @@ class NewsArticleAnalyzer:
     
     def _check_domain_reputation(self, domain: str) -> str:
         """Check domain reputation"""
-        domain_lower = domain.lower()
+        host = domain.lower().split(':', 1)[0]
         
-        # Check trusted domains
-        for trusted, level in TRUSTED_DOMAINS.items():
-            if trusted in domain_lower:
-                return f"trusted_{level}"
-        
-        # Check suspicious domains
-        for suspicious, reason in SUSPICIOUS_DOMAINS.items():
-            if suspicious in domain_lower:
-                return f"suspicious_{reason}"
+        # Peel subdomains left to right: news.bbc.co.uk -> bbc.co.uk -> co.uk
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            rep = _DOMAIN_REPUTATION.get('.'.join(labels[i:]))
+            if rep:
+                return rep
         
         return "unknown"
     
-    def _analyze_content(self, title: str, content: str) -> Tuple[List[str], List[str]]:
-        """Analyze content for risk factors and trust signals"""
+    def _analyze_content(
+        self, title: str, content: str, words: Optional[List[str]] = None,
+        domain_rep: Optional[str] = None
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Analyze content for risk factors and trust signals.
+        For a suspicious domain_rep the credibility scan is skipped when even every
+        indicator matching could not lift the article out of its label.
+        """
         risk_factors = []
         trust_signals = []
         
         full_text = f"{title} {content}".lower()
         
         # Check for clickbait patterns
-        for pattern in CLICKBAIT_PATTERNS:
-            if re.search(pattern, full_text, re.IGNORECASE):
-                risk_factors.append(f"Clickbait pattern: '{pattern}'")
-        
-        # Check for credibility indicators
-        for indicator in CREDIBILITY_INDICATORS:
-            if re.search(indicator, full_text, re.IGNORECASE):
-                trust_signals.append(f"Credibility indicator: '{indicator}'")
+        for i in _CLICKBAIT_SET.matches(full_text):
+            risk_factors.append(f"Clickbait pattern: '{CLICKBAIT_PATTERNS[i]}'")
+        
+        # One pass over the content for all the character/token counts
+        exclamations = quote_marks = caps_words = numbers = 0
+        for m in _STATS_RE.finditer(content):
+            branch = m.lastindex
+            if branch == 1:
+                exclamations += 1
+            elif branch == 2:
+                quote_marks += 1
+            elif branch == 3:
+                caps_words += 1
+            else:
+                numbers += 1
         
         # Check for all caps (sensationalism)
-        words = content.split()
-        caps_words = sum(1 for w in words if w.isupper() and len(w) > 3)
         if caps_words > 5:
             risk_factors.append(f"Excessive capitalization ({caps_words} words)")
         
         # Check for excessive punctuation
-        if content.count('!') > 5:
-            risk_factors.append(f"Excessive exclamation marks ({content.count('!')})")
+        if exclamations > 5:
+            risk_factors.append(f"Excessive exclamation marks ({exclamations})")
         
         # Check article length
-        word_count = len(words)
+        word_count = len(words if words is not None else content.split())
         if word_count < 100:
             risk_factors.append(f"Very short article ({word_count} words)")
         elif word_count > 500:
             trust_signals.append(f"Substantial article length ({word_count} words)")
         
         # Check for quotes (indicates sourcing)
-        quote_count = content.count('"') // 2
+        quote_count = quote_marks // 2
         if quote_count >= 2:
             trust_signals.append(f"Contains quotes from sources ({quote_count})")
         
         # Check for numbers/statistics (indicates research)
-        numbers = re.findall(r'\b\d+(?:\.\d+)?%?\b', content)
-        if len(numbers) >= 3:
-            trust_signals.append(f"Contains statistics/data ({len(numbers)} numbers)")
+        if numbers >= 3:
+            trust_signals.append(f"Contains statistics/data ({numbers} numbers)")
+        
+        # Check for credibility indicators (listed ahead of the other trust signals)
+        if not (domain_rep and domain_rep.startswith("suspicious")
+                and self._label_settled(domain_rep, risk_factors, trust_signals, content)):
+            trust_signals[:0] = [
+                f"Credibility indicator: '{CREDIBILITY_INDICATORS[i]}'"
+                for i in _CREDIBILITY_SET.matches(full_text)
+            ]
         
         return risk_factors, trust_signals
     
+    def _label_settled(
+        self, domain_rep: str, risk_factors: List[str], trust_signals: List[str], content: str
+    ) -> bool:
+        """True if adding every credibility indicator as a trust signal keeps the label"""
+        _, label, _ = self._calculate_authenticity(domain_rep, risk_factors, trust_signals, content)
+        best = trust_signals + [""] * len(CREDIBILITY_INDICATORS)
+        _, best_label, _ = self._calculate_authenticity(domain_rep, risk_factors, best, content)
+        return best_label == label
+    
     def _calculate_authenticity(
         self, 
         domain_rep: str, 
@@ -0,0 +1,69 @@
+"""
+OCR Worker Pool
+Runs EasyOCR in worker processes so concurrent uploads are OCR'd in parallel on CPU.
+Each worker builds its own Reader once (pool initializer), so set OCR_WORKERS with
+memory in mind. On CUDA, or with OCR_WORKERS=0, callers keep their in-process reader.
+"""
+import asyncio
+import importlib.util
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+from config import OCR_MAX_IMAGE_SIDE, OCR_WORKERS
+from services.device import ocr_use_gpu
+
+
+def load_ocr_image(image_bytes: bytes) -> np.ndarray:
+    """Decode an uploaded image into the RGB array EasyOCR expects"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    # OCR gains little past ~1600px on the long edge but pays for every pixel
+    image.thumbnail((OCR_MAX_IMAGE_SIDE, OCR_MAX_IMAGE_SIDE), Image.Resampling.LANCZOS)
+    # View the decoded pixels as a numpy array (no extra copy)
+    return np.asarray(image)
+
+
+# Reader owned by a worker process (built by _init_worker)
+_worker_reader = None
+
+
+def _init_worker():
+    global _worker_reader
+    import easyocr
+    _worker_reader = easyocr.Reader(['en'], gpu=False)
+
+
+def _read_lines(image_bytes: bytes) -> List[str]:
+    """Worker-side OCR: decode + readtext(detail=0)"""
+    return _worker_reader.readtext(load_ocr_image(image_bytes), detail=0)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_ocr_pool() -> Optional[ProcessPoolExecutor]:
+    """Process pool for OCR, or None when OCR should stay in-process"""
+    global _pool
+    if OCR_WORKERS <= 0 or ocr_use_gpu() or importlib.util.find_spec("easyocr") is None:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=_init_worker)
+    return _pool
+
+
+async def read_lines_in_pool(pool: ProcessPoolExecutor, image_bytes: bytes) -> List[str]:
+    """OCR an image in a worker process without blocking the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(pool, _read_lines, image_bytes)
+
+
+def shutdown_ocr_pool():
+    """Stop OCR workers (called at application shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,89 @@
+"""
+Quantized ONNX Sentence Encoder
+Runs an int8 ONNX export of the sentence-transformer on CPU with onnxruntime.
+Produce the export with setup/export_onnx_encoder.py.
+
+Implements the subset of SentenceTransformer.encode() the services use (mean
+pooling, batching, optional L2 normalization and tensor output), so it can
+stand in for it.
+"""
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+except ImportError:
+    ort = None
+
+ONNX_MODEL_FILE = "model-int8.onnx"
+MAX_SEQ_LENGTH = 384  # all-mpnet-base-v2 max_seq_length
+
+
+class OnnxSentenceEncoder:
+    def __init__(self, model_dir: str):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+    
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        convert_to_tensor: bool = False,
+        batch_size: int = 32,
+        **kwargs
+    ):
+        """Embed one sentence (returns dim,) or a list (returns n x dim), float32"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        
+        # Length-sorted batches keep padding (and wasted int8 matmuls) small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        parts = [
+            self._encode_batch([texts[i] for i in order[start:start + batch_size]], normalize_embeddings)
+            for start in range(0, len(texts), batch_size)
+        ]
+        embeddings = np.empty((len(texts), parts[0].shape[1]) if parts else (0, 0), dtype=np.float32)
+        if parts:
+            embeddings[order] = np.concatenate(parts)
+        
+        if convert_to_tensor:
+            import torch
+            embeddings = torch.from_numpy(embeddings)
+        return embeddings[0] if single else embeddings
+    
+    def _encode_batch(self, batch: List[str], normalize_embeddings: bool) -> np.ndarray:
+        tokens = self.tokenizer(
+            batch, padding=True, truncation=True, max_length=MAX_SEQ_LENGTH, return_tensors="np"
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+        token_embeddings = self.session.run(None, feeds)[0]  # (n, seq, dim)
+        
+        # Mean pooling over real (non-padding) tokens, as in the sentence-transformers head
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        
+        return embeddings.astype(np.float32, copy=False)
+
+
+def load_onnx_encoder(model_dir: str) -> Optional[OnnxSentenceEncoder]:
+    """Load the int8 encoder if onnxruntime and the exported model are available"""
+    if ort is None or not os.path.exists(os.path.join(model_dir, ONNX_MODEL_FILE)):
+        return None
+    try:
+        return OnnxSentenceEncoder(model_dir)
+    except Exception as e:
+        print(f"Warning: Failed to load ONNX encoder from {model_dir}: {e}")
+        return None
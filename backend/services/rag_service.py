@@ -7,24 +7,26 @@ RAG Service - Retrieval Augmented Generation for Citizen Chatbot
 from typing import Dict, List, Optional, Any
 from uuid import UUID, uuid4
 from datetime import datetime
+import asyncio
 import google.generativeai as genai
 import time
 
-from supabase import create_client
-from sentence_transformers import SentenceTransformer
-
 from config import (
-    SUPABASE_URL, SUPABASE_KEY,
-    EMBEDDING_MODEL, LLM_MODEL, GOOGLE_API_KEY,
+    LLM_MODEL, GOOGLE_API_KEY,
     CHAT_SESSION_MAX_MESSAGES
 )
+from services.supabase_client import get_supabase
 from services.audit_service import log_ai_decision
+from services.embedding_model import get_embedding_model, get_query_encoder
+from services.semantic_cache import get_semantic_cache
 
-from services.llm_provider import llm_provider
+from services.llm_provider import llm_provider, UNAVAILABLE_PREFIX
 
 # Initialize clients
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+supabase = get_supabase()
+embedding_model = get_embedding_model()
+query_encoder = get_query_encoder()
+
 
 async def create_chat_session(user_id: UUID, session_type: str = "rag") -> UUID:
     """Create a new chat session"""
@@ -39,7 +41,7 @@ async def create_chat_session(user_id: UUID, session_type: str = "rag") -> UUID:
         "created_at": datetime.utcnow().isoformat()
     }
     
-    supabase.table("chat_sessions").insert(record).execute()
+    await asyncio.to_thread(supabase.table("chat_sessions").insert(record).execute)
     return session_id
 
 
@@ -61,11 +63,22 @@ async def chat(
             "max_messages": CHAT_SESSION_MAX_MESSAGES
         }
     
-    # Step 1: Retrieve relevant documents
-    retrieved_docs, vector_ids = await retrieve_context(message)
+    # A near-identical recent question reuses its answer (no retrieval, no LLM call)
+    query_embedding = await query_encoder.encode(" ".join(message.lower().split()))
+    semantic_cache = get_semantic_cache()
+    cached = semantic_cache.get(query_embedding)
     
-    # Step 2: Generate answer with context
-    answer, confidence, sources = await generate_answer(message, retrieved_docs)
+    if cached is not None:
+        retrieved_docs, vector_ids, answer, confidence, sources = cached
+    else:
+        # Step 1: Retrieve relevant documents
+        retrieved_docs, vector_ids = await retrieve_context(message)
+        
+        # Step 2: Generate answer with context
+        answer, confidence, sources = await generate_answer(message, retrieved_docs)
+        
+        if _is_cacheable(answer, confidence, retrieved_docs):
+            semantic_cache.put(query_embedding, (retrieved_docs, vector_ids, answer, confidence, sources))
     
     # Step 3: Store message in session
     await append_message(session_id, "user", message)
@@ -92,19 +105,23 @@ async def chat(
         "answer": answer,
         "confidence": confidence,
         "sources": sources,
-        "decision_id": str(decision_id),
+        "decision_id": str(decision_id) if decision_id else None,
         "session_id": str(session_id)
     }
 
 
+def _is_cacheable(answer: str, confidence: float, retrieved_docs: List[Dict]) -> bool:
+    """Failed generations and live-fines answers (which must reflect edits immediately) aren't cached"""
+    if confidence <= 0 or answer.startswith(UNAVAILABLE_PREFIX):
+        return False
+    return not any((doc.get("metadata") or {}).get("source") == "live_fines" for doc in retrieved_docs)
+
+
 async def retrieve_context(query: str, top_k: int = 5) -> tuple[List[Dict], List[str]]:
     """
     Retrieve relevant document chunks using vector similarity and keyword context.
     Returns (documents, vector_ids)
     """
-    # Generate query embedding
-    query_embedding = embedding_model.encode(query).tolist()
-    
     # Step 1: Live Keyword Search on Official Fines/Policies (THE SOURCE OF TRUTH)
     # This ensures any direct update in Supabase (e.g. helmet fine = 30) is reflected INSTANTLY
     try:
@@ -126,26 +143,20 @@ async def retrieve_context(query: str, top_k: int = 5) -> tuple[List[Dict], List
         all_fine_results = []
         seen_ids = set()
         
-        for kw in keywords[:3]: # check top 3 keywords
-            fines = supabase.table("govt_fines_penalties").select("*") \
-                .or_(f"violation_type.ilike.%{kw}%,description.ilike.%{kw}%") \
-                .execute()
-                
-            if fines.data:
-                for f in fines.data:
-                    if f['id'] not in seen_ids:
-                        text = f"OFFICIAL GOVT RECORD: Violation '{f['violation_type']}' carries a fine of ₹{f['fine_amount']}. Details: {f['description']}."
-                        print(f"SYNC_STATUS: Real-time fine '{f['violation_type']}' (₹{f['fine_amount']}) retrieved from Supabase.")
-                        all_fine_results.append({
-                            "id": f["id"],
-                            "chunk_text": text,
-                            "similarity": 1.0,
-                            "metadata": {"source": "live_fines", "violation": f['violation_type']}
-                        })
-                        seen_ids.add(f['id'])
+        for f in await asyncio.to_thread(_match_live_fines, keywords[:3]): # check top 3 keywords
+            if f['id'] not in seen_ids:
+                text = f"OFFICIAL GOVT RECORD: Violation '{f['violation_type']}' carries a fine of ₹{f['fine_amount']}. Details: {f['description']}."
+                print(f"SYNC_STATUS: Real-time fine '{f['violation_type']}' (₹{f['fine_amount']}) retrieved from Supabase.")
+                all_fine_results.append({
+                    "id": f["id"],
+                    "chunk_text": text,
+                    "similarity": 1.0,
+                    "metadata": {"source": "live_fines", "violation": f['violation_type']}
+                })
+                seen_ids.add(f['id'])
         
         if all_fine_results:
-            return all_fine_results, list(seen_ids)
+            return all_fine_results, [r["id"] for r in all_fine_results]
             
     except Exception as e:
         print(f"Live keyword search failed: {e}")
@@ -153,15 +164,19 @@ async def retrieve_context(query: str, top_k: int = 5) -> tuple[List[Dict], List
     # Step 2: Perform vector similarity search for knowledge base
     # (Fallback/Context for non-fine related queries)
     try:
-        query_embedding = embedding_model.encode(query).tolist()
-        results = supabase.rpc(
+        # Same normalized text chat() encodes for the semantic cache, so this is a query-encoder cache hit there
+        # ("Helmet fine" and "helmet fine" share a cache slot)
+        normalized_query = " ".join(query.lower().split())
+        query_embedding = (await query_encoder.encode(normalized_query)).tolist()
+        # Inner-product search over normalized vectors: setup/migrations/008_rag_embeddings_halfvec_ip.sql
+        results = await asyncio.to_thread(supabase.rpc(
             'match_rag_documents',
             {
                 'query_embedding': query_embedding,
                 'match_threshold': 0.35,
                 'match_count': top_k
             }
-        ).execute()
+        ).execute)
         
         if results.data:
             formatted_results = []
@@ -182,9 +197,9 @@ async def retrieve_context(query: str, top_k: int = 5) -> tuple[List[Dict], List
     
     # Fallback: simple text search (if vector search fails or returns nothing)
     try:
-        results = supabase.table("vectors").select("*").textSearch(
+        results = await asyncio.to_thread(supabase.table("vectors").select("*").textSearch(
             "chunk_text", query, config="english"
-        ).limit(top_k).execute()
+        ).limit(top_k).execute)
         
         if results.data:
             vector_ids = [r["id"] for r in results.data]
@@ -195,6 +210,34 @@ async def retrieve_context(query: str, top_k: int = 5) -> tuple[List[Dict], List
     return [], []
 
 
+def _match_live_fines(keywords: List[str]) -> List[Dict]:
+    """Fines mentioning any keyword, rows for earlier (longer) keywords first"""
+    if not keywords:
+        return []
+    
+    # Trigram-indexed lookup in Postgres (setup/migrations/007_match_govt_fines.sql)
+    try:
+        result = supabase.rpc("match_govt_fines", {"p_keywords": keywords}).execute()
+        return result.data or []
+    except Exception as e:
+        print(f"Fines RPC unavailable, filtering in Python: {e}")
+    
+    # One round-trip for all keywords (keywords are \w-only, so safe inside or_)
+    fines = supabase.table("govt_fines_penalties").select("*") \
+        .or_(",".join(f"violation_type.ilike.%{kw}%,description.ilike.%{kw}%" for kw in keywords)) \
+        .execute()
+    fines_data = fines.data or []
+    
+    # Keep the per-keyword priority order
+    ordered = []
+    for kw in keywords:
+        ordered.extend(
+            f for f in fines_data
+            if kw in (f.get('violation_type') or '').lower() or kw in (f.get('description') or '').lower()
+        )
+    return ordered
+
+
 async def generate_answer(
     query: str,
     context_docs: List[Dict]
@@ -248,7 +291,6 @@ async def ingest_learned_knowledge(query: str, answer: str):
     This automatically triggers the Context Engine broadcast.
     """
     try:
-        # 1. Store in rag_documents (triggers SQL logic to broadcast to all modules)
         title = query[:50] + "..." if len(query) > 50 else query
         
         doc_record = {
@@ -257,51 +299,81 @@ async def ingest_learned_knowledge(query: str, answer: str):
             "document_type": "learned_knowledge",
             "source_module": "rag_chatbot"
         }
+        metadata = {"source": "ollama_learning", "original_query": query}
         
-        result = supabase.table("rag_documents").insert(doc_record).execute()
+        # 1. Generate embedding for the new knowledge
+        # This ensures it's searchable in the next query
+        embedding = (await asyncio.to_thread(
+            embedding_model.encode, answer, normalize_embeddings=True
+        )).tolist()
         
-        if result.data:
-            doc_id = result.data[0]["id"]
-            
-            # 2. Generate embedding for the new knowledge
-            # This ensures it's searchable in the next query
-            embedding = embedding_model.encode(answer).tolist()
+        # 2. Store document + embedding in one transaction (setup/migrations/010_insert_learned_knowledge.sql);
+        # the rag_documents insert triggers SQL logic to broadcast to all modules
+        try:
+            await asyncio.to_thread(supabase.rpc("insert_learned_knowledge", {
+                "p_title": doc_record["title"],
+                "p_content": doc_record["content"],
+                "p_answer": answer,
+                "p_embedding": embedding,
+                "p_metadata": metadata
+            }).execute)
+        except Exception as e:
+            print(f"Learned knowledge RPC unavailable, inserting separately: {e}")
+            result = await asyncio.to_thread(supabase.table("rag_documents").insert(doc_record).execute)
+            if not result.data:
+                return
             
-            supabase.table("rag_embeddings").insert({
-                "document_id": doc_id,
+            await asyncio.to_thread(supabase.table("rag_embeddings").insert({
+                "document_id": result.data[0]["id"],
                 "content": answer,
                 "embedding": embedding,
                 "chunk_index": 0,
-                "metadata": {"source": "ollama_learning", "original_query": query}
-            }).execute()
-            
-            print(f"KNOWLEDGE ACQUIRED: '{title}' synchronized to all modules.")
+                "metadata": metadata
+            }).execute)
+        
+        print(f"KNOWLEDGE ACQUIRED: '{title}' synchronized to all modules.")
             
     except Exception as e:
         print(f"Learning loop failed: {e}")
 
 
-async def call_llm(query: str, context: str) -> str:
-    """Call LLMProvider for answer generation with context (Hybrid)"""
-    
-    system_instruction = "You are CITADEL, an advanced AI assistant for the government. You are helpful, professional, and accurate."
-    
-    prompt = f"""Context from Government Database:
-{context}
+# Static prompt text lives in the system instruction so every turn shares the same prefix
+# (Ollama reuses the evaluated prefix, Gemini receives it as a native system instruction);
+# only the context and question vary per request.
+RAG_SYSTEM_INSTRUCTION = """You are CITADEL, an advanced AI assistant for the government. You are helpful, professional, and accurate.
 
-User Question: {query}
+Each request gives you context from the government database followed by the user's question.
 
 Instructions:
 1. PRIORITIZE information from the provided Context.
 2. If the Context contains the answer, use it and cite source numbers like [Source 1].
 3. If the Context DOES NOT contain the answer, you MAY answer using your internal general knowledge.
 4. If answering from general knowledge, do NOT make up specific government policies or fine amounts.
-5. Be concise and direct.
+5. Be concise and direct."""
+
+NO_CONTEXT_SYSTEM_INSTRUCTION = """You are CITADEL, a helpful government AI chatbot.
+
+System Note: No specific government documents were found for the user's question in the vector database.
+
+Instructions:
+1. Answer the user's question helpfully using your general knowledge.
+2. If the question is about specific local laws, fines, or official procedures that vary by city, advise the user to check the official portal or contact support.
+3. If it is a general question (e.g., "What is AI?", "Who are you?", "How to save water?"), answer it fully.
+4. Keep the tone professional and helpful."""
+
+
+async def call_llm(query: str, context: str) -> str:
+    """Call LLMProvider for answer generation with context (Hybrid)"""
+    
+    prompt = f"""Context from Government Database:
+{context}
+
+User Question: {query}
 
 Answer:"""
     
     try:
-        return await llm_provider.generate(prompt, system_instruction)
+        return await llm_provider.generate_hedged(prompt, RAG_SYSTEM_INSTRUCTION)
     except Exception as e:
         print(f"LLM Provider Error: {e}")
         raise e
@@ -309,22 +381,12 @@ Answer:"""
 async def call_llm_no_context(query: str) -> str:
     """Call LLMProvider for general questions (No docs found)"""
     
-    system_instruction = "You are CITADEL, a helpful government AI chatbot."
-    
     prompt = f"""User Question: "{query}"
 
-System Note: No specific government documents were found for this query in the vector database.
-
-Instructions:
-1. Answer the user's question helpfully using your general knowledge.
-2. If the question is about specific local laws, fines, or official procedures that vary by city, advise the user to check the official portal or contact support.
-3. If it is a general question (e.g., "What is AI?", "Who are you?", "How to save water?"), answer it fully.
-4. Keep the tone professional and helpful.
-
 Answer:"""
     
     try:
-        return await llm_provider.generate(prompt, system_instruction)
+        return await llm_provider.generate_hedged(prompt, NO_CONTEXT_SYSTEM_INSTRUCTION)
     except Exception as e:
         return "I am here to help, but I'm having trouble processing your request right now."
 
@@ -332,7 +394,9 @@ Answer:"""
 
 async def get_session(session_id: UUID) -> Optional[Dict]:
     """Get chat session by ID"""
-    result = supabase.table("chat_sessions").select("*").eq("id", str(session_id)).single().execute()
+    result = await asyncio.to_thread(
+        supabase.table("chat_sessions").select("*").eq("id", str(session_id)).single().execute
+    )
     return result.data
 
 
@@ -343,22 +407,33 @@ async def append_message(
     sources: Optional[List] = None
 ) -> None:
     """Append message to chat session"""
+    message = {
+        "role": role,
+        "content": content,
+        "timestamp": datetime.utcnow().isoformat(),
+        "sources": [s["source_id"] for s in sources] if sources else []
+    }
+    
+    # One atomic UPDATE in Postgres (setup/migrations/009_append_chat_message.sql)
+    try:
+        await asyncio.to_thread(supabase.rpc(
+            "append_chat_message", {"p_session_id": str(session_id), "p_message": message}
+        ).execute)
+        return
+    except Exception as e:
+        print(f"Chat append RPC unavailable, falling back to read-modify-write: {e}")
+    
     session = await get_session(session_id)
     if not session:
         return
     
     messages = session.get("messages", [])
-    messages.append({
-        "role": role,
-        "content": content,
-        "timestamp": datetime.utcnow().isoformat(),
-        "sources": [s["source_id"] for s in sources] if sources else []
-    })
+    messages.append(message)
     
-    supabase.table("chat_sessions").update({
+    await asyncio.to_thread(supabase.table("chat_sessions").update({
         "messages": messages,
         "updated_at": datetime.utcnow().isoformat()
-    }).eq("id", str(session_id)).execute()
+    }).eq("id", str(session_id)).execute)
 
 
 async def update_session_context(
@@ -367,11 +442,11 @@ async def update_session_context(
     vector_ids: List[str]
 ) -> None:
     """Update session with context references"""
-    supabase.table("chat_sessions").update({
+    await asyncio.to_thread(supabase.table("chat_sessions").update({
         "context_documents": doc_ids,
         "vector_index_refs": vector_ids,
         "updated_at": datetime.utcnow().isoformat()
-    }).eq("id", str(session_id)).execute()
+    }).eq("id", str(session_id)).execute)
 
 
 async def get_chat_history(session_id: UUID) -> List[Dict]:
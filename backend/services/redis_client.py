@@ -0,0 +1,31 @@
+"""
+Shared Redis Client
+State that every worker must see (news analysis jobs, dashboard counters) lives
+in Redis when REDIS_URL is set and the redis package is installed. Otherwise
+get_redis() returns None and callers keep that state in-process, which is only
+correct when the API runs a single worker.
+"""
+from typing import Optional
+
+from config import REDIS_URL
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+_client = None
+_warned = False
+
+
+def get_redis() -> Optional["redis.Redis"]:
+    """Get the process-wide Redis client (None when Redis isn't configured)"""
+    global _client, _warned
+    if _client is None:
+        if not REDIS_URL or redis is None:
+            if not _warned:
+                _warned = True
+                print("Redis not configured: news jobs and dashboard counters are per worker.")
+            return None
+        _client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _client
@@ -16,7 +16,16 @@ from datetime import datetime
 from uuid import uuid4
 
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+
+from services.embedding_model import get_embedding_model
+
+# pyahocorasick finds every skill in one linear pass over the resume; without it
+# the skills alternation regex is used
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # simple skills database for extraction (can be expanded)
 # In production, use a proper NER model or large skill taxonomy
@@ -41,6 +50,11 @@ COMMON_SKILLS = {
     "technical documentation", "stakeholder management", "cross-functional collaboration"
 }
 
+# Degree keywords (case-sensitive substrings) and "N years" / "N+ years" / "N-M years"
+DEGREE_KEYWORDS = ["B.Tech", "B.E.", "M.Tech", "M.E.", "MBA", "Ph.D", "Bachelor", "Master", "BSc", "MSc", "Associate"]
+DEGREE_PATTERN = re.compile('|'.join(map(re.escape, DEGREE_KEYWORDS)))
+YEARS_PATTERN = re.compile(r'(\d+)\+?\s*(?:-\s*\d+\s*)?years?', re.IGNORECASE)
+
 JOB_DATASET_PATH = r"C:\Users\shlok\.cache\kagglehub\datasets\adityarajsrv\job-descriptions-2025-tech-and-non-tech-roles\versions\1\job_dataset.csv"
 
 def load_skills_from_csv(csv_path: str) -> set:
@@ -61,6 +75,35 @@ def load_skills_from_csv(csv_path: str) -> set:
         print(f"Could not load skills from CSV: {e}")
         return set()
 
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+def _select_skill_matches(text: str, matches) -> List[str]:
+    """
+    Reduce Aho-Corasick (end_index, skill) hits to what the skills regex
+    (r'\b(?:longest|...|shortest)\b' with findall) would return: hits need a
+    word boundary on both sides, and scanning left to right each position keeps
+    its longest hit, with no overlaps.
+    """
+    n = len(text)
+    candidates = []
+    for end, skill in matches:
+        start = end - len(skill) + 1
+        before_is_word = start > 0 and _is_word_char(text[start - 1])
+        after_is_word = end + 1 < n and _is_word_char(text[end + 1])
+        if before_is_word != _is_word_char(skill[0]) and after_is_word != _is_word_char(skill[-1]):
+            candidates.append((start, -len(skill), skill))
+    
+    found = []
+    next_free = 0
+    for start, neg_len, skill in sorted(candidates):
+        if start >= next_free:
+            found.append(skill)
+            next_free = start - neg_len
+    return found
+
+
 @dataclass
 class MatchResult:
     """Result of a resume-job match"""
@@ -87,16 +130,23 @@ class ResumeMatcher:
     
     def __init__(self, model_name: str = "all-mpnet-base-v2"):
         # We reuse the model if already loaded in memory to save RAM
-        # For simplicity in this script, we load it fresh or rely on singletons
-        print(f"Loading embedding model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
-        print("Model loaded.")
+        # Shared with the RAG / document services when they use the same model
+        self.model = get_embedding_model(model_name)
         
         # Load additional skills
         skills_set = COMMON_SKILLS.union(load_skills_from_csv(JOB_DATASET_PATH))
         # Sort by length (longest first) to match "Machine Learning" before "Learning"
         self.skills = sorted(list(skills_set), key=len, reverse=True)
         
+        # Aho-Corasick automaton over all skills (when pyahocorasick is installed)
+        self.skills_automaton = None
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for skill in self.skills:
+                automaton.add_word(skill, skill)
+            automaton.make_automaton()
+            self.skills_automaton = automaton
+        
         # Compile huge regex for efficiency
         pattern_str = r'\b(?:' + '|'.join(map(re.escape, self.skills)) + r')\b'
         try:
@@ -109,6 +159,8 @@ class ResumeMatcher:
     def extract_skills(self, text: str) -> List[str]:
         """Simple keyword-based skill extraction"""
         text_lower = text.lower()
+        if self.skills_automaton is not None:
+            return list(set(_select_skill_matches(text_lower, self.skills_automaton.iter(text_lower))))
         if self.skills_pattern:
             return list(set(self.skills_pattern.findall(text_lower)))
         
@@ -123,7 +175,7 @@ class ResumeMatcher:
         """Extract years of experience from text"""
         # Look for patterns like "5 years experience", "5+ years", etc.
         # This is a heuristic
-        matches = re.findall(r'(\d+)\+?\s*(?:-\s*\d+\s*)?years?', text.lower())
+        matches = YEARS_PATTERN.findall(text)
         if matches:
             try:
                 # Take the max found to represent total experience
@@ -134,23 +186,12 @@ class ResumeMatcher:
 
     def extract_education(self, text: str) -> str:
         """Extract education details (simple heuristic)"""
-        # Look for degrees
-        degrees = ["B.Tech", "B.E.", "M.Tech", "M.E.", "MBA", "Ph.D", "Bachelor", "Master", "BSc", "MSc", "Associate"]
-        lines = text.split('\n')
-        found_edu = []
-        for line in lines:
-            line_clean = line.strip()
-            if any(deg in line_clean for deg in degrees) or "Education" in line_clean:
-                 # Check if line has degree keywords but isn't just a header "Education" function
-                 if len(line_clean.split()) > 10: # Likely a detailed line
-                     if any(deg in line_clean for deg in degrees):
-                        found_edu.append(line_clean)
-                 elif any(deg in line_clean for deg in degrees):
-                     found_edu.append(line_clean)
-        
-        if found_edu:
-            # Return the first meaningful education line found
-            return found_edu[0]
+        # Look for degrees: the first line mentioning one (a bare "Education" header doesn't count)
+        match = DEGREE_PATTERN.search(text)
+        if match:
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            line_end = text.find('\n', match.end())
+            return text[line_start:line_end if line_end != -1 else len(text)].strip()
         return "Not Specified"
 
 
@@ -164,12 +205,51 @@ class ResumeMatcher:
         """
         Calculate match score between resume and job description.
         """
-        # 1. Feature Extraction
-        candidate_skills = self.extract_skills(resume_text)
-        candidate_years = self.extract_years_experience(resume_text)
+        return self.match_batch([resume_text], job_description_text, job_skills, job_min_years)[0]
+    
+    def match_batch(
+        self,
+        resume_texts: List[str],
+        job_description_text: str,
+        job_skills: Optional[List[str]] = None,
+        job_min_years: float = 0,
+        batch_size: int = 32
+    ) -> List[MatchResult]:
+        """
+        Match many resumes against one job description.
+        The job is encoded once, together with the resumes in one batched encode()
+        call (which length-sorts its inputs), then scored with a single cosine-similarity matmul.
+        Results are in the order of resume_texts.
+        """
+        if not resume_texts:
+            return []
         
         if not job_skills:
             job_skills = self.extract_skills(job_description_text)
+        
+        # Semantic Similarity (40% weight): the job text rides along as the last input
+        embeddings = self.model.encode(
+            list(resume_texts) + [job_description_text],
+            batch_size=batch_size, convert_to_tensor=True, show_progress_bar=False
+        )
+        semantic_scores = util.cos_sim(embeddings[:-1], embeddings[-1:])[:, 0].tolist()
+        
+        return [
+            self._score(text, job_skills, job_min_years, semantic_score)
+            for text, semantic_score in zip(resume_texts, semantic_scores)
+        ]
+    
+    def _score(
+        self,
+        resume_text: str,
+        job_skills: List[str],
+        job_min_years: float,
+        semantic_score: float
+    ) -> MatchResult:
+        """Combine skill, experience and semantic scores for one resume"""
+        # 1. Feature Extraction
+        candidate_skills = set(self.extract_skills(resume_text))
+        candidate_years = self.extract_years_experience(resume_text)
             
         # 2. Skill Match Score (40% weight)
         if job_skills:
@@ -196,11 +276,6 @@ class ResumeMatcher:
             exp_score = 1.0 # No requirement
             exp_status = "unknown"
             
-        # 4. Semantic Similarity (40% weight)
-        # Encode both texts
-        embeddings = self.model.encode([resume_text, job_description_text], convert_to_tensor=True)
-        semantic_score = util.pytorch_cos_sim(embeddings[0], embeddings[1]).item()
-        
         # Clamp scores
         skill_score = max(0.0, min(1.0, skill_score))
         semantic_score = max(0.0, min(1.0, semantic_score))
@@ -11,17 +11,16 @@ import json
 import io
 import re
 
-from supabase import create_client
 import numpy as np
 from sentence_transformers import util
 import torch
 
-from config import SUPABASE_URL, SUPABASE_KEY
+from services.supabase_client import get_supabase
 from services.audit_service import log_ai_decision
 from services.resume_matcher import get_matcher  # Use our new matcher logic
 
 # Initialize clients
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = get_supabase()
 # We rely on get_matcher() to hold the model instance
 
 async def parse_resume(
@@ -331,7 +330,7 @@ async def match_resume_to_job(resume_id: UUID, job_id: UUID) -> Dict[str, Any]:
         "missing_skills": match_result.missing_skills,
         "confidence": match_result.match_score / 100.0,
         "explanation": f"Score: {match_result.match_score}%. Matched {len(match_result.matched_skills)} skills.",
-        "decision_id": str(decision_id),
+        "decision_id": str(decision_id) if decision_id else None,
         "created_at": datetime.utcnow().isoformat()
     }
     
@@ -0,0 +1,81 @@
+"""
+Semantic Answer Cache
+Remembers recent chatbot answers keyed by the question's (unit-length) embedding.
+A new question whose embedding is within SEMANTIC_CACHE_THRESHOLD cosine similarity
+of a cached one reuses that answer, skipping retrieval and the LLM call.
+Entries expire after SEMANTIC_CACHE_TTL_SECONDS; the least recently used entry is
+evicted when the cache is full.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+
+from config import (
+    EMBEDDING_DIMENSION, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL_SECONDS
+)
+
+
+class SemanticCache:
+    """Fixed-capacity embedding matrix + LRU order over its slots"""
+
+    def __init__(self, max_size: int, threshold: float, ttl_seconds: float, dimension: int):
+        self._threshold = threshold
+        self._ttl_seconds = ttl_seconds
+        self._vectors = np.zeros((max_size, dimension), dtype=np.float32)
+        self._used = np.zeros(max_size, dtype=bool)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # slot -> (expires_at, value), LRU first
+        self._free = list(range(max_size - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def get(self, embedding) -> Optional[Any]:
+        """Value cached for the most similar question, if it clears the threshold"""
+        query = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if not self._entries:
+                return None
+            # One matrix-vector product over every slot; empty slots can't win
+            scores = self._vectors @ query
+            scores[~self._used] = -np.inf
+            slot = int(np.argmax(scores))
+            if scores[slot] < self._threshold:
+                return None
+
+            expires_at, value = self._entries[slot]
+            if expires_at < time.monotonic():
+                self._release(slot)
+                return None
+            self._entries.move_to_end(slot)
+            return value
+
+    def put(self, embedding, value: Any):
+        """Cache value under the question embedding (evicts the LRU entry when full)"""
+        with self._lock:
+            if not self._free:
+                oldest, _ = self._entries.popitem(last=False)
+                self._used[oldest] = False
+                self._free.append(oldest)
+            slot = self._free.pop()
+            self._vectors[slot] = np.asarray(embedding, dtype=np.float32)
+            self._used[slot] = True
+            self._entries[slot] = (time.monotonic() + self._ttl_seconds, value)
+
+    def _release(self, slot: int):
+        del self._entries[slot]
+        self._used[slot] = False
+        self._free.append(slot)
+
+
+_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the process-wide chatbot answer cache"""
+    global _cache
+    if _cache is None:
+        _cache = SemanticCache(
+            SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL_SECONDS, EMBEDDING_DIMENSION
+        )
+    return _cache
@@ -0,0 +1,159 @@
+"""
+Dashboard Stats Counters
+Counters read by /api/dashboard/stats as a single snapshot, incremented (and,
+for gauges like open_tickets, decremented) by the endpoints that produce the activity.
+
+Counters ending in _today / _this_month are bucketed by UTC day / month, so a
+snapshot only sees the current period. The other counters are running gauges,
+seeded from count queries at startup (seed_gauges) so they survive restarts.
+With REDIS_URL set the counters are Redis hashes shared by every worker;
+otherwise they are kept per process.
+"""
+import asyncio
+import threading
+from typing import Callable, Dict, Tuple
+
+from services.clock import now_iso
+from services.redis_client import get_redis
+from services.supabase_client import get_supabase
+
+# Every counter the dashboard shows, per role (reported as 0 until first touched)
+COUNTER_KEYS = {
+    'government_official': (
+        'documents_processed_today',
+        'violations_detected_today',
+        'active_alerts',
+        'pending_reviews',
+        'candidates_in_pipeline'
+    ),
+    'citizen': (
+        'queries_this_month',
+        'open_tickets',
+        'resolved_tickets',
+        'news_checks'
+    )
+}
+
+# Ticket statuses that no longer count as open (shared with ticket_service)
+DONE_TICKET_STATUSES = ["resolved", "closed"]
+_CITIZEN_SOURCE = "source.eq.citizen,source.is.null"  # support analyzer rows carry no source
+
+# Gauge -> count query over the table it mirrors
+_GAUGE_QUERIES: Dict[Tuple[str, str], Callable] = {
+    ('citizen', 'open_tickets'): lambda db: db.table('tickets').select('id', count='exact')
+        .not_.in_('status', DONE_TICKET_STATUSES).or_(_CITIZEN_SOURCE),
+    ('citizen', 'resolved_tickets'): lambda db: db.table('tickets').select('id', count='exact')
+        .in_('status', DONE_TICKET_STATUSES).or_(_CITIZEN_SOURCE),
+    ('government_official', 'active_alerts'): lambda db: db.table('tickets').select('id', count='exact')
+        .eq('source', 'anomaly_system').not_.in_('status', DONE_TICKET_STATUSES),
+    ('government_official', 'pending_reviews'): lambda db: db.table('ai_decisions').select('id', count='exact')
+        .eq('requires_human_review', True).or_('human_reviewed.is.null,human_reviewed.is.false'),
+    ('government_official', 'candidates_in_pipeline'): lambda db: db.table('resumes').select('id', count='exact'),
+}
+
+# Period buckets outlive their period a little, then Redis drops them
+_PERIOD_TTL_SECONDS = {'day': 2 * 86400, 'month': 32 * 86400}
+
+
+def _bucket(key: str) -> Tuple[str, int]:
+    """Period bucket for a counter ('' for running totals) and its Redis TTL"""
+    if key.endswith('_today'):
+        return now_iso()[:10], _PERIOD_TTL_SECONDS['day']
+    if key.endswith('_this_month'):
+        return now_iso()[:7], _PERIOD_TTL_SECONDS['month']
+    return '', 0
+
+
+class StatsCounters:
+    """Per-role counters with O(1) updates and one-read snapshots"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], Dict[str, int]] = {}  # (role, bucket) -> counts, without Redis
+
+    def increment(self, role: str, key: str, amount: int = 1) -> None:
+        """Add amount (may be negative) to a role's counter in the current period"""
+        bucket, ttl = _bucket(key)
+        client = get_redis()
+        if client is not None:
+            try:
+                name = f"stats:{role}:{bucket}" if bucket else f"stats:{role}"
+                pipe = client.pipeline()
+                pipe.hincrby(name, key, amount)
+                if ttl:
+                    pipe.expire(name, ttl)
+                pipe.execute()
+            except Exception as e:
+                print(f"Warning: Failed to update stats counter {role}.{key}: {e}")
+            return
+
+        with self._lock:
+            counters = self._counters.setdefault((role, bucket), {})
+            counters[key] = counters.get(key, 0) + amount
+
+    def seed(self, role: str, key: str, value: int) -> None:
+        """Set a running gauge's starting value (Redis keeps a value another worker already set)"""
+        client = get_redis()
+        if client is not None:
+            try:
+                client.hsetnx(f"stats:{role}", key, value)
+            except Exception as e:
+                print(f"Warning: Failed to seed stats counter {role}.{key}: {e}")
+            return
+
+        with self._lock:
+            self._counters.setdefault((role, ''), {})[key] = value
+
+    def decrement(self, role: str, key: str, amount: int = 1) -> None:
+        """Subtract amount from a role's counter"""
+        self.increment(role, key, -amount)
+
+    def snapshot(self, role: str) -> Dict[str, int]:
+        """Get a consistent copy of all counters for a role (current periods only)"""
+        keys = COUNTER_KEYS.get(role, ())
+        buckets = {_bucket(key)[0] for key in keys} | {''}
+        values = dict.fromkeys(keys, 0)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline()
+                for bucket in buckets:
+                    pipe.hgetall(f"stats:{role}:{bucket}" if bucket else f"stats:{role}")
+                for counts in pipe.execute():
+                    values.update({key: int(count) for key, count in counts.items()})
+            except Exception as e:
+                print(f"Warning: Failed to read stats counters for {role}: {e}")
+        else:
+            with self._lock:
+                # Drop buckets from past periods while we hold the lock
+                for stale in [k for k in self._counters if k[0] == role and k[1] not in buckets]:
+                    del self._counters[stale]
+                for bucket in buckets:
+                    values.update(self._counters.get((role, bucket), {}))
+
+        # A gauge only dips below zero if its seed missed rows (e.g. the count query failed)
+        return {key: max(count, 0) for key, count in values.items()}
+
+
+async def seed_gauges() -> None:
+    """Start the running gauges from the current table counts (called once at startup)"""
+    counters = get_stats_counters()
+    supabase = get_supabase()
+    for (role, key), query in _GAUGE_QUERIES.items():
+        try:
+            result = await asyncio.to_thread(lambda: query(supabase).limit(1).execute())
+            counters.seed(role, key, result.count or 0)
+        except Exception as e:
+            print(f"Warning: Failed to seed stats counter {role}.{key}: {e}")
+
+
+# Singleton instance
+_stats_counters = None
+
+def get_stats_counters() -> StatsCounters:
+    """Get singleton stats counters instance"""
+    global _stats_counters
+    if _stats_counters is None:
+        _stats_counters = StatsCounters()
+    return _stats_counters
@@ -0,0 +1,75 @@
+"""
+Shared Supabase Clients
+- Sync client for code paths that still use the blocking postgrest API
+- Async client for request handlers so DB round-trips don't block the event loop
+
+Every service module uses these instead of calling create_client() itself,
+so the whole process reuses one keep-alive connection pool.
+"""
+import asyncio
+from typing import Optional
+
+import httpx
+from supabase import create_client, Client, acreate_client, AsyncClient
+from supabase.lib.client_options import ClientOptions
+
+from config import SUPABASE_URL, SUPABASE_KEY, SERVICE_TIMEOUT_SECONDS
+
+_client: Optional[Client] = None
+_async_client: Optional[AsyncClient] = None
+_async_client_lock = asyncio.Lock()
+
+
+def _http_client_kwargs() -> dict:
+    """Pool settings shared by the sync and async PostgREST HTTP clients"""
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return dict(
+        http2=http2,
+        timeout=SERVICE_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60)
+    )
+
+
+def _pooled_http_client() -> httpx.Client:
+    """HTTP client for PostgREST: multiplexed over HTTP/2 when h2 is installed, with warm keep-alives"""
+    return httpx.Client(**_http_client_kwargs())
+
+
+def get_supabase() -> Client:
+    """Get the process-wide sync Supabase client"""
+    global _client
+    if _client is None:
+        try:
+            options = ClientOptions(
+                postgrest_client_timeout=SERVICE_TIMEOUT_SECONDS,
+                httpx_client=_pooled_http_client()
+            )
+        except TypeError:
+            # supabase releases without httpx_client injection keep postgrest's own pool
+            options = ClientOptions(postgrest_client_timeout=SERVICE_TIMEOUT_SECONDS)
+        _client = create_client(SUPABASE_URL, SUPABASE_KEY, options=options)
+    return _client
+
+
+async def get_async_supabase() -> AsyncClient:
+    """Get the process-wide async Supabase client (created on first use)"""
+    global _async_client
+    if _async_client is None:
+        async with _async_client_lock:
+            if _async_client is None:
+                try:
+                    from supabase.lib.client_options import AsyncClientOptions
+                    options = AsyncClientOptions(
+                        postgrest_client_timeout=SERVICE_TIMEOUT_SECONDS,
+                        httpx_client=httpx.AsyncClient(**_http_client_kwargs())
+                    )
+                except (ImportError, TypeError):
+                    # Older supabase releases: keep postgrest's own async pool
+                    options = None
+                _async_client = await acreate_client(SUPABASE_URL, SUPABASE_KEY, options=options)
+    return _async_client
@@ -3,12 +3,12 @@ Customer Support Ticket Analyzer for C.I.T.A.D.E.L.
 Classifies, prioritizes, and routes citizen support tickets using NLP.
 """
 
+import asyncio
 from typing import Dict, List, Optional
 from datetime import datetime
 from uuid import uuid4
 
-from supabase import create_client
-from config import SUPABASE_URL, SUPABASE_KEY
+from services.supabase_client import get_supabase
 
 
 class TicketAnalyzer:
@@ -53,7 +53,7 @@ class TicketAnalyzer:
     }
     
     def __init__(self):
-        self.supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase = get_supabase()
     
     async def analyze_ticket(
         self, 
@@ -93,20 +93,18 @@ class TicketAnalyzer:
             'created_at': datetime.now().isoformat()
         }
         
-        # Store in database
-        try:
-            self.supabase.table('tickets').insert({
-                'id': str(uuid4()),
-                'user_id': user_id,
-                'title': title,
-                'text': description,
-                'category': category,
-                'priority_score': {'high': 1, 'medium': 2, 'low': 3}.get(priority, 2),
-                'status': 'open',
-                'created_at': datetime.now().isoformat()
-            }).execute()
-        except Exception as e:
-            print(f"Warning: Failed to store ticket: {e}")
+        # Store in database (direct: status lookups read the row straight back)
+        ticket_row = {
+            'id': str(uuid4()),
+            'user_id': user_id,
+            'title': title,
+            'text': description,
+            'category': category,
+            'priority_score': {'high': 1, 'medium': 2, 'low': 3}.get(priority, 2),
+            'status': 'open',
+            'created_at': datetime.now().isoformat()
+        }
+        await asyncio.to_thread(self.supabase.table('tickets').insert(ticket_row).execute)
         
         return result
     
@@ -5,22 +5,23 @@ Ticket Analyzer Service
 - Resolution hints via RAG
 - HITL workflow integration
 """
+import asyncio
 from typing import Dict, List, Optional, Any, Tuple
 from uuid import UUID, uuid4
 from datetime import datetime
 
-from supabase import create_client
-
 from config import (
-    SUPABASE_URL, SUPABASE_KEY,
     CONFIDENCE_THRESHOLD_LOW, CONFIDENCE_THRESHOLD_HIGH,
     REQUIRE_HITL_FOR_ENFORCEMENT
 )
+from services.supabase_client import get_supabase
 from services.audit_service import log_ai_decision, log_audit_event
 from services.rag_service import retrieve_context, generate_answer
+from services.write_queue import get_write_queue
+from services.stats_counters import get_stats_counters, DONE_TICKET_STATUSES
 
 # Initialize Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = get_supabase()
 
 # Category taxonomy
 CATEGORIES = {
@@ -86,7 +87,10 @@ async def create_ticket(
         "created_at": datetime.utcnow().isoformat()
     }
     
-    supabase.table("tickets").insert(ticket_record).execute()
+    # Direct insert: callers get the id back and read, update or assign the row right away
+    await asyncio.to_thread(supabase.table("tickets").insert(ticket_record).execute)
+    if source == "citizen":
+        get_stats_counters().increment('citizen', 'open_tickets')
     
     # Log ticket creation in history
     await log_ticket_history(
@@ -94,25 +98,25 @@ async def create_ticket(
         new_value={"status": "open", "category": category, "priority": priority}
     )
     
-    # Log AI decisions
-    await log_ai_decision(
-        model_name="ticket-classify-v1",
-        model_version="1.0.0",
-        module="ticket_analyzer",
-        input_data={"title": title, "description": description[:500]},
-        output={"category": category, "subcategory": subcategory, "priority": priority},
-        confidence=class_confidence,
-        evidence=[{"source": "classification", "category": category}],
-        explanation=f"Classified as {category}/{subcategory} with {priority} priority"
-    )
-    
-    # Audit log
-    await log_audit_event(
-        action="ticket_created",
-        entity_type="ticket",
-        entity_id=ticket_id,
-        actor_id=submitter_id,
-        details={"category": category, "priority": priority, "requires_review": requires_review}
+    # Log AI decision and audit event together (independent writes)
+    await asyncio.gather(
+        log_ai_decision(
+            model_name="ticket-classify-v1",
+            model_version="1.0.0",
+            module="ticket_analyzer",
+            input_data={"title": title, "description": description[:500]},
+            output={"category": category, "subcategory": subcategory, "priority": priority},
+            confidence=class_confidence,
+            evidence=[{"source": "classification", "category": category}],
+            explanation=f"Classified as {category}/{subcategory} with {priority} priority"
+        ),
+        log_audit_event(
+            action="ticket_created",
+            entity_type="ticket",
+            entity_id=ticket_id,
+            actor_id=submitter_id,
+            details={"category": category, "priority": priority, "requires_review": requires_review}
+        )
     )
     
     return ticket_record
@@ -238,12 +242,24 @@ async def update_ticket_status(
         "updated_at": datetime.utcnow().isoformat()
     }
     
-    if new_status in ["resolved", "closed"]:
+    if new_status in DONE_TICKET_STATUSES:
         update_data["resolved_by"] = str(updated_by)
         update_data["resolved_at"] = datetime.utcnow().isoformat()
     
     supabase.table("tickets").update(update_data).eq("id", str(ticket_id)).execute()
     
+    # Citizen tickets move between the dashboard's open and resolved counts;
+    # anomaly alert tickets leave (or rejoin) the active alerts
+    source = current.data.get("source") or "citizen"
+    was_done = old_status in DONE_TICKET_STATUSES
+    is_done = new_status in DONE_TICKET_STATUSES
+    step = 1 if is_done and not was_done else -1 if was_done and not is_done else 0
+    if step and source == "citizen":
+        get_stats_counters().decrement('citizen', 'open_tickets', step)
+        get_stats_counters().increment('citizen', 'resolved_tickets', step)
+    elif step and source == "anomaly_system":
+        get_stats_counters().decrement('government_official', 'active_alerts', step)
+    
     # Log history
     await log_ticket_history(
         ticket_id, "status_changed",
@@ -289,7 +305,7 @@ async def log_ticket_history(
         "changed_by": str(changed_by) if changed_by else None,
         "created_at": datetime.utcnow().isoformat()
     }
-    supabase.table("ticket_history").insert(record).execute()
+    await get_write_queue().enqueue("ticket_history", record)
 
 
 async def get_ticket(ticket_id: UUID) -> Optional[Dict]:
@@ -31,6 +31,9 @@ class TrafficViolationDetector:
         self.evidence_dir = Path(".tmp/evidence")
         self.evidence_dir.mkdir(parents=True, exist_ok=True)
         
+        # violation_id -> evidence frame path, for serving frames back
+        self.evidence_index: Dict[str, str] = {}
+        
         # Try to load OpenCV, gracefully fallback if not available
         self.cv2 = None
         try:
@@ -80,6 +83,8 @@ class TrafficViolationDetector:
                 'status': 'pending_review'
             }
             evidence_packages.append(package)
+            if package['evidence_frame']:
+                self.evidence_index[package['violation_id']] = package['evidence_frame']
         
         return {
             'total_violations': len(evidence_packages),
@@ -176,6 +181,13 @@ class TrafficViolationDetector:
         
         return None
     
+    def get_evidence_path(self, violation_id: str) -> Optional[str]:
+        """Get the saved evidence frame for a violation, if it still exists"""
+        path = self.evidence_index.get(violation_id)
+        if path and os.path.exists(path):
+            return path
+        return None
+    
     async def get_violation_stats(self, user_id: str) -> Dict:
         """Get violation detection statistics"""
         return {
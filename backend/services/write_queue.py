@@ -0,0 +1,134 @@
+"""
+Background Write Queue
+Collects append-only Supabase inserts from write endpoints and flushes them
+in batches (every 100ms or 50 rows), one bulk insert per table.
+
+Rows are eventually persisted: callers that must read their own write
+straight away should insert directly instead of enqueueing.
+A table batch that fails is retried once, then inserted row by row so one bad
+row only loses itself; rows that still fail are logged with the error.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from services.supabase_client import get_supabase
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 50
+FLUSH_INTERVAL_SECONDS = 0.1
+
+# Queued by stop(): the flush loop persists the batch in hand, then exits
+_STOP = object()
+
+
+class WriteQueue:
+    """Batches (table, row) inserts and flushes them from a background task"""
+
+    def __init__(self, max_batch: int = MAX_BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the flush loop on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and persist anything still queued"""
+        if self._task is None:
+            return
+        # No cancel: a batch already taken off the queue is flushed before the loop exits
+        self._queue.put_nowait(_STOP)
+        await self._task
+        self._task = None
+
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await self._flush(pending)
+
+    async def enqueue(self, table: str, row: Dict) -> None:
+        """Queue a row for insertion (inserts immediately if the flusher isn't running)"""
+        if not self.running:
+            get_supabase().table(table).insert(row).execute()
+            return
+        self._queue.put_nowait((table, row))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[str, Dict]]) -> None:
+        # Group by table, keeping first-seen order so parent rows land before children
+        by_table: Dict[str, List[Dict]] = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        for table, rows in by_table.items():
+            await asyncio.to_thread(self._insert_batch, table, rows)
+
+    @classmethod
+    def _insert_batch(cls, table: str, rows: List[Dict]) -> None:
+        for attempt in range(2):
+            try:
+                cls._insert(table, rows)
+                return
+            except Exception as e:
+                logger.warning("Bulk insert of %d rows to %s failed (attempt %d): %s", len(rows), table, attempt + 1, e)
+        if len(rows) == 1:
+            logger.error("Dropped row for %s after retry: %r", table, rows[0])
+            return
+
+        # Isolate the bad rows instead of losing the whole batch
+        for row in rows:
+            try:
+                cls._insert(table, row)
+            except Exception:
+                logger.exception("Dropped row for %s: %r", table, row)
+
+    @staticmethod
+    def _insert(table: str, rows) -> None:
+        get_supabase().table(table).insert(rows).execute()
+
+
+# Singleton instance
+_write_queue = None
+
+def get_write_queue() -> WriteQueue:
+    """Get singleton write queue instance"""
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue()
+    return _write_queue
@@ -0,0 +1,30 @@
+"""
+Build the Document Classifier prototype artifact for C.I.T.A.D.E.L.
+Embeds the fixed class prototypes once and saves them to
+data/processed/doc_classifier_prototypes.npz, so the backend skips the
+encoding step at startup. Re-run after changing PROTOTYPES, the embedding
+model, or exporting the ONNX encoder.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.doc_classifier import DocumentClassifier, PROTOTYPE_ARTIFACT, load_encoder
+
+
+def build_prototypes() -> Path:
+    encoder, model_id = load_encoder()
+    classifier = DocumentClassifier(encoder, model_id)
+    classifier._embed_prototypes()  # always re-encode, even if an artifact was loaded
+    
+    PROTOTYPE_ARTIFACT.parent.mkdir(parents=True, exist_ok=True)
+    classifier.save_prototypes()
+    print(f"  ✓ Wrote {PROTOTYPE_ARTIFACT} ({model_id}, {len(classifier.class_names)} classes)")
+    return PROTOTYPE_ARTIFACT
+
+
+if __name__ == "__main__":
+    build_prototypes()
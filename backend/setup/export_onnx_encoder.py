@@ -0,0 +1,43 @@
+"""
+Export the document-classifier encoder to int8 ONNX for C.I.T.A.D.E.L.
+Converts the sentence-transformer to ONNX and applies dynamic int8
+quantization, writing model-int8.onnx + tokenizer files to CLASSIFIER_ONNX_DIR.
+Run this ONCE (needs: pip install optimum[onnxruntime]).
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import EMBEDDING_MODEL, CLASSIFIER_ONNX_DIR
+from services.onnx_encoder import ONNX_MODEL_FILE
+
+
+def export_encoder(model_name: str = EMBEDDING_MODEL, out_dir: str = CLASSIFIER_ONNX_DIR) -> Path:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from transformers import AutoTokenizer
+    
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    
+    print(f"  Exporting {repo_id} to ONNX...")
+    model = ORTModelForFeatureExtraction.from_pretrained(repo_id, export=True)
+    model.save_pretrained(out)
+    AutoTokenizer.from_pretrained(repo_id).save_pretrained(out)
+    
+    print("  Quantizing weights to int8...")
+    quantize_dynamic(
+        model_input=str(out / "model.onnx"),
+        model_output=str(out / ONNX_MODEL_FILE),
+        weight_type=QuantType.QInt8
+    )
+    print(f"  ✓ Wrote {out / ONNX_MODEL_FILE}")
+    return out / ONNX_MODEL_FILE
+
+
+if __name__ == "__main__":
+    export_encoder()
@@ -0,0 +1,32 @@
+-- C.I.T.A.D.E.L. - Decision lineage in one round-trip
+-- Walks ai_decisions.parent_decision_id from a root decision up to its origin.
+-- Used by services/audit_service.get_decision_lineage via supabase.rpc().
+
+CREATE OR REPLACE FUNCTION get_decision_lineage(root uuid)
+RETURNS TABLE (
+    id uuid,
+    model_name text,
+    model_version text,
+    module text,
+    confidence double precision,
+    parent_decision_id uuid,
+    created_at timestamptz
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH RECURSIVE chain AS (
+        SELECT d.id, d.model_name, d.model_version, d.module, d.confidence::double precision,
+               d.parent_decision_id, d.created_at, 0 AS depth
+        FROM ai_decisions d
+        WHERE d.id = root
+        UNION ALL
+        SELECT d.id, d.model_name, d.model_version, d.module, d.confidence::double precision,
+               d.parent_decision_id, d.created_at, c.depth + 1
+        FROM ai_decisions d
+        JOIN chain c ON d.id = c.parent_decision_id
+        WHERE c.depth < 100  -- guard against accidental cycles
+    )
+    SELECT id, model_name, model_version, module, confidence, parent_decision_id, created_at
+    FROM chain
+    ORDER BY depth;
+$$;
@@ -0,0 +1,23 @@
+-- C.I.T.A.D.E.L. - Sensor baseline aggregates
+-- Returns one row of stats instead of shipping every reading to the API.
+-- Used by services/anomaly_service.get_sensor_baseline via supabase.rpc().
+
+CREATE OR REPLACE FUNCTION sensor_baseline(p_sensor_id text, p_since timestamptz)
+RETURNS TABLE (
+    reading_count bigint,
+    mean double precision,
+    min double precision,
+    max double precision,
+    latest double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT count(*),
+           avg(value)::double precision,
+           min(value)::double precision,
+           max(value)::double precision,
+           (array_agg(value::double precision ORDER BY created_at DESC))[1]
+    FROM sensor_readings
+    WHERE sensor_id = p_sensor_id
+      AND created_at >= p_since;
+$$;
@@ -0,0 +1,22 @@
+-- C.I.T.A.D.E.L. - Per-sensor-type summary for a zone
+-- Groups a zone's recent readings in Postgres so correlation gets ~1 row per sensor type.
+-- Used by services/anomaly_service.correlate_sensors via supabase.rpc().
+
+CREATE OR REPLACE FUNCTION zone_sensor_summary(p_zone text, p_since timestamptz)
+RETURNS TABLE (
+    sensor_type text,
+    reading_count bigint,
+    anomaly_count bigint,
+    latest_anomaly_value double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT sensor_type,
+           count(*),
+           count(*) FILTER (WHERE anomaly_detected),
+           (array_agg(value::double precision ORDER BY created_at DESC) FILTER (WHERE anomaly_detected))[1]
+    FROM sensor_readings
+    WHERE location @> jsonb_build_object('zone', p_zone)
+      AND created_at >= p_since
+    GROUP BY sensor_type;
+$$;
@@ -0,0 +1,23 @@
+-- C.I.T.A.D.E.L. - Rollup counts for sampled-out AI decisions
+-- When AUDIT_SAMPLE_RATE < 1, high-confidence decisions that are not stored in
+-- ai_decisions are still counted here per (month, model, module).
+-- Used by services/audit_service.flush_decision_counters via supabase.rpc().
+
+CREATE TABLE IF NOT EXISTS ai_decision_counters (
+    month DATE NOT NULL,
+    model_name TEXT NOT NULL,
+    module TEXT NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, model_name, module)
+);
+
+CREATE OR REPLACE FUNCTION bump_ai_decision_counters(p_rows jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO ai_decision_counters AS c (month, model_name, module, count)
+    SELECT (r->>'month')::date, r->>'model_name', r->>'module', (r->>'count')::bigint
+    FROM jsonb_array_elements(p_rows) AS r
+    ON CONFLICT (month, model_name, module)
+    DO UPDATE SET count = c.count + EXCLUDED.count;
+$$;
@@ -0,0 +1,36 @@
+-- C.I.T.A.D.E.L. - Yearly transparency aggregates
+-- Rolls up expense_summaries (and their by_category JSON) in Postgres so the portal gets one row.
+-- Used by services/expense_service.get_citizen_transparency_view via supabase.rpc().
+
+CREATE OR REPLACE FUNCTION citizen_yearly(p_year int, p_department text DEFAULT NULL)
+RETURNS TABLE (
+    total_spending double precision,
+    by_department jsonb,
+    by_category jsonb,
+    summary_count bigint
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH s AS (
+        SELECT coalesce(department, 'other') AS department,
+               coalesce(total_amount, 0)::double precision AS total_amount,
+               coalesce(by_category, '{}'::jsonb) AS by_category
+        FROM expense_summaries
+        WHERE period_start >= make_date(p_year, 1, 1)
+          AND (p_department IS NULL OR department = p_department)
+    ),
+    dept AS (
+        SELECT department, sum(total_amount) AS amount
+        FROM s
+        GROUP BY department
+    ),
+    cat AS (
+        SELECT c.key AS category, sum(c.value::double precision) AS amount
+        FROM s, jsonb_each_text(s.by_category) AS c
+        GROUP BY c.key
+    )
+    SELECT (SELECT coalesce(sum(total_amount), 0) FROM s),
+           (SELECT coalesce(jsonb_object_agg(department, amount), '{}'::jsonb) FROM dept),
+           (SELECT coalesce(jsonb_object_agg(category, amount), '{}'::jsonb) FROM cat),
+           (SELECT count(*) FROM s);
+$$;
@@ -0,0 +1,54 @@
+-- C.I.T.A.D.E.L. - Unit-length document vectors + inner-product search
+-- With every embedding L2-normalized, cosine similarity is just the inner product, so the
+-- HNSW index uses vector_ip_ops and match_documents orders by <#> (no per-row norm math).
+-- Used by services/document_intel.search_documents via supabase.rpc().
+-- Requires pgvector >= 0.7 (l2_normalize, hnsw).
+
+-- Normalize on write so every producer (uploads, resumes, seed scripts) stays consistent
+CREATE OR REPLACE FUNCTION normalize_vector_embedding()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.embedding IS NOT NULL THEN
+        NEW.embedding := l2_normalize(NEW.embedding);
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS vectors_normalize_embedding ON vectors;
+CREATE TRIGGER vectors_normalize_embedding
+    BEFORE INSERT OR UPDATE OF embedding ON vectors
+    FOR EACH ROW EXECUTE FUNCTION normalize_vector_embedding();
+
+-- Backfill rows written before this migration
+UPDATE vectors SET embedding = l2_normalize(embedding) WHERE embedding IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS vectors_embedding_ip_idx
+    ON vectors USING hnsw (embedding vector_ip_ops);
+
+DROP FUNCTION IF EXISTS match_documents(vector, double precision, integer);
+CREATE OR REPLACE FUNCTION match_documents(
+    query_embedding vector(768),
+    match_threshold double precision,
+    match_count integer
+)
+RETURNS TABLE (
+    id uuid,
+    doc_id uuid,
+    source_type text,
+    page integer,
+    chunk_text text,
+    similarity double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    -- <#> is the negative inner product; for unit vectors -(a <#> b) is the cosine similarity
+    SELECT id, doc_id, source_type, page, chunk_text,
+           -(embedding <#> l2_normalize(query_embedding)) AS similarity
+    FROM vectors
+    WHERE -(embedding <#> l2_normalize(query_embedding)) > match_threshold
+    ORDER BY embedding <#> l2_normalize(query_embedding)
+    LIMIT match_count;
+$$;
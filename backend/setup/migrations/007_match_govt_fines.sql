@@ -0,0 +1,30 @@
+-- C.I.T.A.D.E.L. - Live fines keyword lookup
+-- One call returns every fine whose violation_type or description contains any of the
+-- chat keywords, ordered by the first (highest-priority) keyword it matches.
+-- Used by services/rag_service.retrieve_context via supabase.rpc().
+-- Requires pg_trgm (trigram GIN index so '%keyword%' ILIKE can use an index).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS govt_fines_penalties_text_trgm_idx
+    ON govt_fines_penalties
+    USING gin ((coalesce(violation_type, '') || ' ' || coalesce(description, '')) gin_trgm_ops);
+
+CREATE OR REPLACE FUNCTION match_govt_fines(p_keywords text[], p_limit int DEFAULT NULL)
+RETURNS SETOF govt_fines_penalties
+LANGUAGE sql STABLE
+AS $$
+    SELECT f.*
+    FROM govt_fines_penalties f
+    CROSS JOIN LATERAL (
+        SELECT min(k.ord) AS priority
+        FROM unnest(p_keywords) WITH ORDINALITY AS k(keyword, ord)
+        WHERE (coalesce(f.violation_type, '') || ' ' || coalesce(f.description, ''))
+              ILIKE '%' || k.keyword || '%'
+    ) m
+    -- Bitmap-scannable prefilter on the trigram index; the lateral only ranks survivors
+    WHERE (coalesce(f.violation_type, '') || ' ' || coalesce(f.description, ''))
+          ILIKE ANY (SELECT '%' || keyword || '%' FROM unnest(p_keywords) AS keyword)
+    ORDER BY m.priority
+    LIMIT p_limit;
+$$;
@@ -0,0 +1,43 @@
+-- C.I.T.A.D.E.L. - Unit-length RAG vectors + half-precision inner-product search
+-- Same scheme as 006 for the chatbot corpus: embeddings are L2-normalized on write, so
+-- cosine similarity is the inner product. The HNSW index is built over a halfvec cast of
+-- the column, which halves the index pages each search touches; the stored float32
+-- vectors are left as they are.
+-- Used by services/rag_service.retrieve_context via supabase.rpc().
+-- Requires pgvector >= 0.7 (l2_normalize, halfvec, hnsw).
+
+DROP TRIGGER IF EXISTS rag_embeddings_normalize_embedding ON rag_embeddings;
+CREATE TRIGGER rag_embeddings_normalize_embedding
+    BEFORE INSERT OR UPDATE OF embedding ON rag_embeddings
+    FOR EACH ROW EXECUTE FUNCTION normalize_vector_embedding();  -- defined in 006
+
+-- Backfill rows written before this migration
+UPDATE rag_embeddings SET embedding = l2_normalize(embedding) WHERE embedding IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS rag_embeddings_embedding_halfvec_ip_idx
+    ON rag_embeddings USING hnsw ((embedding::halfvec(768)) halfvec_ip_ops)
+    WITH (m = 16, ef_construction = 64);
+
+DROP FUNCTION IF EXISTS match_rag_documents(vector, double precision, integer);
+CREATE OR REPLACE FUNCTION match_rag_documents(
+    query_embedding vector(768),
+    match_threshold double precision,
+    match_count integer
+)
+RETURNS TABLE (
+    id uuid,
+    document_id uuid,
+    content text,
+    metadata jsonb,
+    similarity double precision
+)
+LANGUAGE sql STABLE
+AS $$
+    -- The ORDER BY expression matches the index expression, so the HNSW index is used
+    SELECT id, document_id, content, metadata,
+           -(embedding::halfvec(768) <#> l2_normalize(query_embedding)::halfvec(768)) AS similarity
+    FROM rag_embeddings
+    WHERE -(embedding::halfvec(768) <#> l2_normalize(query_embedding)::halfvec(768)) > match_threshold
+    ORDER BY embedding::halfvec(768) <#> l2_normalize(query_embedding)::halfvec(768)
+    LIMIT match_count;
+$$;
@@ -0,0 +1,14 @@
+-- C.I.T.A.D.E.L. - Atomic chat message append
+-- Appends one message to chat_sessions.messages in a single UPDATE, replacing the
+-- read-then-write pair (and its lost-update race between concurrent turns).
+-- Used by services/rag_service.append_message via supabase.rpc().
+
+CREATE OR REPLACE FUNCTION append_chat_message(p_session_id uuid, p_message jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE chat_sessions
+    SET messages = coalesce(messages, '[]'::jsonb) || jsonb_build_array(p_message),
+        updated_at = now()
+    WHERE id = p_session_id;
+$$;
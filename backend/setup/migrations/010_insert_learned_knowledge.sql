@@ -0,0 +1,29 @@
+-- C.I.T.A.D.E.L. - Learning loop insert in one transaction
+-- Writes the learned rag_documents row and its rag_embeddings row together, so the
+-- chatbot's learning loop is one round-trip and a failed embedding insert can't leave
+-- an orphaned document behind. Insert triggers on rag_documents fire as before.
+-- Used by services/rag_service.ingest_learned_knowledge via supabase.rpc().
+
+CREATE OR REPLACE FUNCTION insert_learned_knowledge(
+    p_title text,
+    p_content text,
+    p_answer text,
+    p_embedding vector(768),
+    p_metadata jsonb
+)
+RETURNS uuid
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_doc_id uuid;
+BEGIN
+    INSERT INTO rag_documents (title, content, document_type, source_module)
+    VALUES (p_title, p_content, 'learned_knowledge', 'rag_chatbot')
+    RETURNING id INTO v_doc_id;
+
+    INSERT INTO rag_embeddings (document_id, content, embedding, chunk_index, metadata)
+    VALUES (v_doc_id, p_answer, p_embedding, 0, p_metadata);
+
+    RETURN v_doc_id;
+END;
+$$;
@@ -0,0 +1,16 @@
+import asyncio
+from services.document_intel import extract_fields
+
+async def test_shadowed_field():
+    # "Name:" greedily spans the newline into "Date", so the combined scan skips the first date
+    text = "Name: John Doe\nDate: 01/02/2023\nSubmitted. Date: 05/06/2024"
+    fields, confidence = await extract_fields(text, "application")
+    values = {f["name"]: f["value"] for f in fields}
+    print(f"Fields: {values}")
+    
+    assert values["date"] == "01/02/2023", values["date"]
+    assert values["applicant_name"].startswith("John Doe"), values["applicant_name"]
+    print("Shadowed field extraction OK")
+
+if __name__ == "__main__":
+    asyncio.run(test_shadowed_field())
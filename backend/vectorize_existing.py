@@ -16,7 +16,7 @@ async def vectorize_existing_docs():
         eb = supabase.table("rag_embeddings").select("id").eq("document_id", doc['id']).execute()
         if not eb.data:
             print(f"Vectorizing: {doc['id']}...")
-            vector = model.encode(doc['content']).tolist()
+            vector = model.encode(doc['content'], normalize_embeddings=True).tolist()
             supabase.table("rag_embeddings").insert({
                 "document_id": doc['id'],
                 "content": doc['content'],